@@ -1,24 +1,65 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-import plotly.express as px
+from datetime import datetime, timedelta
 from database import (
-    get_all_donations,
-    get_all_expenses,
-    get_teacher_salaries,
+    get_donations_df,
+    get_expenses_df,
+    get_salaries_df,
+    get_dashboard_summary,
+    get_time_series,
+    get_balance_as_of,
+    get_cash_flow,
+    fetch_concurrently,
+    get_donations_page,
+    get_expenses_page,
+    get_salaries_page,
+    search_donations,
+    search_expenses,
+    search_salaries,
+    get_donor_leaderboard,
+    get_donor_overview,
+    get_filter_values,
+    DONOR_SORTS,
+    LAPSED_AFTER_DAYS,
     add_donation,
     add_expense,
     add_salary,
-    verify_admin,
     update_donation,
     update_expense,
     update_salary,
     delete_donation,
     delete_expense,
     delete_salary,
-    change_admin_password
+    apply_changes,
+    change_admin_password,
+    get_pool_status,
+    ensure_initialized
 )
 from translations import get_text
+import formatting
+from formatting import format_currency
+from cache import get_cache_stats
+from diagnostics import get_diagnostics, record_page
+from replica import get_replica_status
+import auth
+from pydantic import ValidationError
+from importer import IMPORT_SCHEMAS, import_file
+from exporter import EXPORT_FORMATS, export_bytes, export_filename
+from periods import PERIOD_PRESETS, fiscal_year_label, period_range
+from models import EXPENSE_CATEGORIES
+from search import MIN_QUERY_LENGTH
+
+# Rows shown in each of the dashboard's recent-activity tables
+DASHBOARD_RECENT_ROWS = 50
+
+# Page-size choices for the ledger pages
+PAGE_SIZES = [10, 25, 50, 100]
+
+
+# Reverse proxies in front of the app appending to X-Forwarded-For; with none (the default) the header is ignored
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
 
 st.set_page_config(
     page_title="Maktab Financial Dashboard",
@@ -29,6 +70,8 @@ st.set_page_config(
 def initialize_session_state():
     if 'language' not in st.session_state:
         st.session_state.language = 'bn'
+    # Tokens used to be kept in the URL; drop any still in an old link or bookmark
+    st.query_params.pop('session', None)
 
 def language_selector():
     languages = {
@@ -47,11 +90,30 @@ def language_selector():
             st.session_state.language = languages[selected_lang]
             st.rerun()
 
+def client_id():
+    # The caller's address is the entry the outermost trusted proxy appended
+    forwarded = st.context.headers.get('X-Forwarded-For')
+    if TRUSTED_PROXY_HOPS and isinstance(forwarded, str):
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    # ip_address is only a string when a browser is connected; headless runs share one id
+    ip_address = st.context.ip_address
+    return ip_address if isinstance(ip_address, str) else "unknown"
+
 def check_admin_auth():
-    if 'is_admin' not in st.session_state:
-        st.session_state.is_admin = False
+    # The token lives only in server-side session state, never in the URL where it could be shared
+    token = st.session_state.get('auth_token')
+    username = auth.verify_token(token, client_id())
+    if token and not username:
+        clear_auth_token()
+    st.session_state.is_admin = username is not None
     return st.session_state.is_admin
 
+def clear_auth_token():
+    st.session_state.pop('auth_token', None)
+    st.session_state.is_admin = False
+
 def login_page():
     st.title("Admin Login")
     with st.form("login_form"):
@@ -60,43 +122,226 @@ def login_page():
         submit = st.form_submit_button("Login")
         
         if submit:
-            if verify_admin(username, password):
-                st.session_state.is_admin = True
+            client = client_id()
+            retry_after = auth.login_retry_after(username, client)
+            if retry_after:
+                st.error(f"Too many failed attempts. Try again in {retry_after} seconds.")
+                return
+            token = auth.login(username, password, client)
+            if token:
+                st.session_state.auth_token = token
                 st.success("Login successful!")
                 st.rerun()
             else:
                 st.error("Invalid credentials")
 
-def format_currency(value):
-    return f"৳{value:,.2f}"
-
 def style_dataframe(df):
     # Rename columns to more readable names using translations
-    column_map = {
-        'donor_name': get_text('column_donor_name', st.session_state.language),
-        'display_name': get_text('column_display_name', st.session_state.language),
-        'teacher_name': get_text('column_teacher_name', st.session_state.language),
-        'description': get_text('column_description', st.session_state.language),
-        'amount': get_text('column_amount', st.session_state.language),
-        'date': get_text('column_date', st.session_state.language),
-        'notes': get_text('column_notes', st.session_state.language),
-        'category': get_text('column_category', st.session_state.language),
-        'is_anonymous': get_text('column_is_anonymous', st.session_state.language)
-    }
+    column_map = formatting.column_map(st.session_state.language)
     df = df.rename(columns={k: v for k, v in column_map.items() if k in df.columns})
     
-    # Format date
-    date_column = get_text('column_date', st.session_state.language)
-    if date_column in df.columns:
-        df[date_column] = pd.to_datetime(df[date_column]).dt.strftime('%d %B, %Y')
+    # Format dates
+    for column in ('date', 'first_gift', 'last_gift'):
+        if column_map[column] in df.columns:
+            df[column_map[column]] = formatting.format_dates(df[column_map[column]])
     
-    # Format amount
-    amount_column = get_text('column_amount', st.session_state.language)
-    if amount_column in df.columns:
-        df[amount_column] = df[amount_column].apply(format_currency)
+    # Format amounts
+    for column in ('amount', 'balance', 'total', 'average'):
+        if column_map[column] in df.columns:
+            df[column_map[column]] = formatting.format_currency_array(df[column_map[column]])
     
     return df
 
+def period_selector(key, default, open_ended=True):
+    """Render a PERIOD_PRESETS picker (with 'all_time' only if `open_ended`) and return its inclusive (start, end), None for an open end."""
+    presets = [preset for preset in PERIOD_PRESETS if open_ended or preset != 'all_time'] + ['custom']
+    labels = {get_text(f'period_{preset}', st.session_state.language): preset for preset in presets}
+    selected = st.selectbox(
+        get_text('period', st.session_state.language),
+        options=list(labels.keys()),
+        index=presets.index(default),
+        key=f"{key}_period",
+    )
+    preset = labels[selected]
+    if preset == 'custom':
+        today = datetime.now().date()
+        col1, col2 = st.columns(2)
+        with col1:
+            start = st.date_input(get_text('from_date', st.session_state.language), today - timedelta(days=29), key=f"{key}_start")
+        with col2:
+            end = st.date_input(get_text('to_date', st.session_state.language), today, key=f"{key}_end")
+        return start, end
+    
+    start, end = period_range(preset)
+    if start is not None:
+        caption = f"{start:%d %B, %Y} – {end:%d %B, %Y}"
+        if preset.endswith('fiscal_year'):
+            caption = get_text('fiscal_year', st.session_state.language).format(fiscal_year_label(start)) + ": " + caption
+        st.caption(caption)
+    return start, end
+
+def filter_selector(key, kind, label, include_anonymous=True):
+    """Render a picker of one donor, category or teacher (`kind` is the ledger's table); None means all of them"""
+    everyone = get_text('all_entries', st.session_state.language)
+    selected = st.selectbox(label, [everyone] + get_filter_values(kind, include_anonymous), key=f"{key}_filter")
+    return None if selected == everyone else selected
+
+def ledger_page(key, fetch_page, search_page=None, filters=None):
+    """Render search, page-size and navigation controls for a ledger and return the current page as a DataFrame."""
+    filters = filters or {}
+    cursor_key = f"{key}_cursor"
+    if cursor_key not in st.session_state:
+        st.session_state[cursor_key] = {}
+    
+    def reset_cursor():
+        st.session_state[cursor_key] = {}
+    
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        reset_cursor()
+    
+    query = ""
+    if search_page is not None:
+        query = st.text_input(
+            get_text('search', st.session_state.language),
+            key=f"{key}_search",
+            help=get_text('search_help', st.session_state.language),
+            on_change=reset_cursor,
+        ).strip()
+    # Shorter queries match nothing, so they page through the ledger as if the box were empty
+    searching = len(query) >= MIN_QUERY_LENGTH
+    if searching:
+        fetch = lambda page_size, **cursor: search_page(query, page_size, **filters, **cursor)
+    else:
+        fetch = lambda page_size, **cursor: fetch_page(page_size, **filters, **cursor)
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size", on_change=reset_cursor)
+    
+    page = fetch(page_size, **st.session_state[cursor_key])
+    
+    # The page we were on may have been emptied by a delete; start again from the newest rows
+    if page['frame'].empty and st.session_state[cursor_key]:
+        reset_cursor()
+        page = fetch(page_size)
+    if page['frame'].empty and searching:
+        st.info(get_text('no_search_results', st.session_state.language))
+    elif page['frame'].empty and filters:
+        st.info(get_text('no_entries_in_period', st.session_state.language))
+    
+    with col2:
+        if st.button("← Previous", key=f"{key}_prev", disabled=not page['has_prev']):
+            st.session_state[cursor_key] = {'before': page['first_cursor']}
+            st.rerun()
+    with col3:
+        if st.button("Next →", key=f"{key}_next", disabled=not page['has_next']):
+            st.session_state[cursor_key] = {'after': page['last_cursor']}
+            st.rerun()
+    
+    return page['frame']
+
+def show_export(ledger):
+    with st.expander(get_text('export', st.session_state.language)):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start = st.date_input(get_text('from_date', st.session_state.language), value=None, key=f"{ledger}_export_start")
+        with col2:
+            end = st.date_input(get_text('to_date', st.session_state.language), value=None, key=f"{ledger}_export_end")
+        with col3:
+            fmt = st.selectbox(get_text('export_format', st.session_state.language), list(EXPORT_FORMATS), format_func=str.upper, key=f"{ledger}_export_format")
+        st.caption(get_text('export_help', st.session_state.language))
+        
+        # Visitors get anonymous donors' names replaced, as on the pages
+        anonymous_label = None if check_admin_auth() else get_text('anonymous_donor', st.session_state.language)
+        mime, _ = EXPORT_FORMATS[fmt]
+        # A callable is only run when the button is clicked, not on every rerun
+        st.download_button(
+            get_text('download', st.session_state.language),
+            data=lambda: export_bytes(ledger, fmt, start, end, anonymous_label),
+            file_name=export_filename(ledger, fmt, start, end),
+            mime=mime,
+            key=f"{ledger}_export",
+            on_click="ignore",
+        )
+
+def _editor_value(value):
+    """A DataFrame or data editor cell as a plain Python value for validation"""
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def show_batch_editor(ledger, df, column_config):
+    """Editable grid over the current page; saving applies every added, changed and deleted row in one transaction."""
+    model, schema = IMPORT_SCHEMAS[ledger]
+    columns = list(column_config)
+    column_map = formatting.column_map(st.session_state.language)
+    column_config = {column: {'label': column_map[column], **config} for column, config in column_config.items()}
+    # A new key after each save starts the editor afresh on the reloaded page
+    version_key = f"{ledger}_editor_version"
+    editor_key = f"{ledger}_editor_{st.session_state.get(version_key, 0)}"
+    
+    st.caption(get_text('batch_edit_help', st.session_state.language))
+    # Categorical columns would limit cells to the values already on the page
+    data = df[columns].astype({column: object for column in columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+    if 'date' in data.columns:
+        data['date'] = data['date'].dt.date
+    st.data_editor(data, key=editor_key, column_config=column_config, num_rows="dynamic", hide_index=True, use_container_width=True)
+    
+    if not st.button(get_text('save_changes', st.session_state.language), key=f"{ledger}_save", type="primary"):
+        return
+    changes = st.session_state[editor_key]
+    inserted, updated, errors = [], {}, []
+    
+    def validate(position, values):
+        try:
+            values = {field: _editor_value(value) for field, value in values.items()}
+            return schema.model_validate({field: value for field, value in values.items() if value is not None}).model_dump()
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            errors.append(get_text('invalid_row', st.session_state.language).format(row=position + 1, error=message))
+    
+    for index, edits in changes['edited_rows'].items():
+        row = validate(int(index), {**df.iloc[int(index)][columns].to_dict(), **edits})
+        if row is not None:
+            updated[int(df.iloc[int(index)]['id'])] = {field: row[field] for field in edits}
+    for position, values in enumerate(changes['added_rows'], start=len(df)):
+        row = validate(position, values)
+        if row is not None:
+            inserted.append(row)
+    deleted = [int(df.iloc[index]['id']) for index in changes['deleted_rows']]
+    
+    if errors:
+        for error in errors:
+            st.error(error)
+        return
+    if not (inserted or updated or deleted):
+        st.info(get_text('no_changes', st.session_state.language))
+        return
+    result = apply_changes(model, inserted, updated, deleted)
+    st.session_state[version_key] = st.session_state.get(version_key, 0) + 1
+    st.toast(get_text('changes_saved', st.session_state.language).format(**result))
+    st.rerun()
+
+def show_bulk_import():
+    st.header("Bulk Import")
+    
+    ledger = st.selectbox("Import into", list(IMPORT_SCHEMAS.keys()), format_func=str.title)
+    _, schema = IMPORT_SCHEMAS[ledger]
+    st.caption("Expected columns: " + ", ".join(schema.model_fields))
+    
+    with st.form("bulk_import_form"):
+        upload = st.file_uploader("CSV or Excel file", type=["csv", "xlsx"])
+        
+        if st.form_submit_button("Import") and upload is not None:
+            result = import_file(upload, ledger)
+            st.success(f"Imported {result['inserted']} rows.")
+            if result['errors']:
+                st.warning(f"{len(result['errors'])} rows were skipped because they failed validation.")
+                st.dataframe(pd.DataFrame(result['errors'], columns=["Row", "Error"]), use_container_width=True, hide_index=True)
+
 def show_admin_settings():
     st.header("Admin Settings")
     
@@ -115,12 +360,85 @@ def show_admin_settings():
             else:
                 if change_admin_password(username, old_password, new_password):
                     st.success("Password changed successfully!")
-                    st.session_state.is_admin = False  # Force re-login
+                    auth.revoke_tokens(username)
+                    clear_auth_token()  # Force re-login
                     st.rerun()
                 else:
                     st.error("Current password is incorrect!")
+    
+    show_diagnostics()
+
+def show_diagnostics():
+    st.subheader("Diagnostics")
+    diagnostics = get_diagnostics()
+    queries, pool_wait = diagnostics['queries'], diagnostics['pool_wait']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Queries", queries['count'])
+    col2.metric("Query p50 / p95", f"{queries['p50_ms']:.1f} / {queries['p95_ms']:.1f} ms")
+    col3.metric("Query p99", f"{queries['p99_ms']:.1f} ms")
+    col4.metric("Pool wait p95", f"{pool_wait['p95_ms']:.1f} ms")
+    
+    pool = get_pool_status()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Connections in use", pool['checked_out'])
+    col2.metric("Waiting for a connection", pool['waiting'])
+    if 'size' in pool:
+        col3.metric("Idle / pool size", f"{pool['idle']} / {pool['size']}")
+        col4.metric("Overflow in use", f"{pool['overflow']} / {pool['max_overflow']}")
+    else:
+        col3.metric("Pool", pool['pool'])
+    if pool['timeouts']:
+        st.warning(f"{pool['timeouts']} checkouts timed out waiting for a connection")
+    
+    stats = get_cache_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cache Hits", stats['hits'])
+    col2.metric("Cache Misses", stats['misses'])
+    col3.metric("Cache Hit Rate", f"{stats['hit_rate']:.0%}")
+    col4.metric("Cached Results", stats['entries'])
+    
+    replica_status = get_replica_status()
+    if replica_status['enabled']:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Replica", "ready" if replica_status['ready'] else "syncing")
+        col2.metric("Replica Age", formatting.format_age(replica_status['staleness_s']))
+        col3.metric("Replica Stale", "yes" if replica_status['stale'] else "no")
+        if replica_status['last_error']:
+            st.warning(f"Last replica sync failed: {replica_status['last_error']}")
+    
+    if diagnostics['pages']:
+        st.markdown("**Page render times**")
+        pages = pd.DataFrame([{'page': page, **timings} for page, timings in diagnostics['pages'].items()])
+        st.dataframe(pages.round(1), use_container_width=True, hide_index=True)
+    
+    if diagnostics['statements']:
+        st.markdown("**Statements (slowest p95 first)**")
+        statements = pd.DataFrame(diagnostics['statements']).drop(columns='count')
+        st.dataframe(statements.round(1), use_container_width=True, hide_index=True)
+    
+    st.markdown("**Slow queries**")
+    if diagnostics['slow_queries']:
+        slow = pd.DataFrame(diagnostics['slow_queries'])
+        slow['at'] = pd.to_datetime(slow['at'], unit='s')
+        st.dataframe(slow.round(1), use_container_width=True, hide_index=True)
+    else:
+        st.info("No queries over the slow-query threshold yet.")
+
+def show_replica_status():
+    # Pages read from the local replica when one is configured, so say how current it is
+    status = get_replica_status()
+    if not status['enabled']:
+        return
+    if not status['ready']:
+        st.caption(get_text('replica_syncing', st.session_state.language))
+    elif status['stale']:
+        st.warning(get_text('replica_stale', st.session_state.language).format(formatting.format_age(status['staleness_s'])))
+    else:
+        st.caption(get_text('replica_age', st.session_state.language).format(formatting.format_age(status['staleness_s'])))
 
 def main():
+    ensure_initialized()
     initialize_session_state()
     language_selector()
     
@@ -130,7 +448,7 @@ def main():
     with st.sidebar:
         if check_admin_auth():
             if st.button(get_text('logout', st.session_state.language)):
-                st.session_state.is_admin = False
+                clear_auth_token()
                 st.rerun()
             st.success(get_text('logged_in', st.session_state.language))
         else:
@@ -138,6 +456,7 @@ def main():
             if st.button(get_text('admin_login', st.session_state.language)):
                 st.session_state.current_page = "login"
                 st.rerun()
+        show_replica_status()
     
     if not check_admin_auth() and st.session_state.get('current_page') == "login":
         login_page()
@@ -147,39 +466,59 @@ def main():
     if check_admin_auth():
         page = st.sidebar.selectbox(
             "Select Page",
-            ["Dashboard", "Donations", "Expenses", "Teacher Salaries", "Admin Settings"]
+            ["Dashboard", "Donations", "Donors", "Expenses", "Teacher Salaries", "Cash Flow", "Bulk Import", "Admin Settings"]
         )
     else:
         page = st.sidebar.selectbox(
             "Select Page",
-            ["Dashboard", "Donations", "Expenses", "Teacher Salaries"]
+            ["Dashboard", "Donations", "Donors", "Expenses", "Teacher Salaries", "Cash Flow"]
         )
     
+    started = time.perf_counter()
     if page == "Admin Settings" and check_admin_auth():
         show_admin_settings()
+    elif page == "Bulk Import" and check_admin_auth():
+        show_bulk_import()
     elif page == "Dashboard":
         show_dashboard()
     elif page == "Donations":
         show_donations()
+    elif page == "Donors":
+        show_donors()
     elif page == "Expenses":
         show_expenses()
     elif page == "Teacher Salaries":
         show_teacher_salaries()
+    elif page == "Cash Flow":
+        show_cash_flow()
+    record_page(page, time.perf_counter() - started)
 
 def show_dashboard():
     st.header(get_text('financial_overview', st.session_state.language))
+    start, end = period_selector("dashboard", 'this_fiscal_year')
     
     # Summary cards
     col1, col2, col3 = st.columns(3)
     
-    # Summary statistics
-    donations = get_all_donations()
-    expenses = get_all_expenses()
-    salaries = get_teacher_salaries()
+    granularities = ['day', 'week', 'month', 'year']
+    granularity = st.session_state.get('trend_granularity', 'month')
     
-    total_donations = sum(d['amount'] for d in donations) if donations else 0
-    total_expenses = sum(e['amount'] for e in expenses) if expenses else 0
-    total_salaries = sum(s['amount'] for s in salaries) if salaries else 0
+    # Summary statistics aggregated in the database, fetched in parallel
+    results, timings = fetch_concurrently({
+        'summary': lambda: get_dashboard_summary(start, end),
+        'trends': lambda: get_time_series(granularity, start, end),
+        'donations': lambda: get_donations_df(limit=DASHBOARD_RECENT_ROWS, start=start, end=end),
+        'expenses': lambda: get_expenses_df(limit=DASHBOARD_RECENT_ROWS, start=start, end=end),
+        'salaries': lambda: get_salaries_df(limit=DASHBOARD_RECENT_ROWS, start=start, end=end),
+    })
+    summary = results['summary']
+    df_donations = results['donations']
+    df_expenses = results['expenses']
+    df_salaries = results['salaries']
+    
+    total_donations = summary['total_donations']
+    total_expenses = summary['total_expenses']
+    total_salaries = summary['total_salaries']
     
     # Add metric styling
     metric_style = """
@@ -199,20 +538,39 @@ def show_dashboard():
     with col3:
         st.metric(get_text('total_salaries', st.session_state.language), format_currency(total_salaries))
     
-    # Monthly trends chart - Commented out
-    # st.subheader(get_text('monthly_trends', st.session_state.language))
-    # if donations:  # Only show chart if there are donations
-    #     df_donations = pd.DataFrame(donations)
-    #     df_donations['date'] = pd.to_datetime(df_donations['date'])
-    #     monthly_donations = df_donations.groupby(df_donations['date'].dt.strftime('%Y-%m'))[['amount']].sum()
-    #     fig = px.line(monthly_donations, 
-    #                  title="Monthly Donations",
-    #                  labels={'value': 'Amount (৳)', 'index': 'Month'},
-    #                  template="plotly_white")
-    #     fig.update_traces(line_color="#2ecc71", line_width=3)
-    #     st.plotly_chart(fig, use_container_width=True)
-    # else:
-    #     st.info(get_text('no_donations_data', st.session_state.language))
+    # Trends chart, bucketed in the database
+    st.subheader(get_text('financial_trends', st.session_state.language))
+    labels = {get_text(f'granularity_{option}', st.session_state.language): option for option in granularities}
+    selected = st.selectbox(
+        get_text('granularity', st.session_state.language),
+        options=list(labels.keys()),
+        index=granularities.index(granularity)
+    )
+    if labels[selected] != granularity:
+        st.session_state.trend_granularity = labels[selected]
+        st.rerun()
+    trends = results['trends']['frame']
+    if not trends.empty:
+        # Plotly is only needed for this chart, so it is imported on first render rather than at startup
+        import plotly.express as px
+        series = {
+            'donation': get_text('donations', st.session_state.language),
+            'expense': get_text('expenses', st.session_state.language),
+            'salary': get_text('teacher_salaries', st.session_state.language),
+        }
+        fig = px.line(trends.rename(columns=series), x='period', y=list(series.values()),
+                     labels={'value': 'Amount (৳)', 'period': get_text('column_date', st.session_state.language), 'variable': ''},
+                     color_discrete_sequence=["#2ecc71", "#e74c3c", "#3498db"],
+                     template="plotly_white")
+        fig.update_traces(line_width=3)
+        st.plotly_chart(fig, use_container_width=True)
+        if results['trends']['granularity'] != granularity:
+            st.caption(get_text('granularity_coarsened', st.session_state.language).format(
+                get_text(f"granularity_{results['trends']['granularity']}", st.session_state.language)))
+    elif start is None and end is None:
+        st.info(get_text('no_donations_data', st.session_state.language))
+    else:
+        st.info(get_text('no_entries_in_period', st.session_state.language))
     
     # Display all data tables
     col1, col2 = st.columns(2)
@@ -220,19 +578,16 @@ def show_dashboard():
     with col1:
         # Recent Donations
         st.subheader(get_text('recent_donations', st.session_state.language))
-        if donations:
-            df_donations = pd.DataFrame(donations)
-            
+        if not df_donations.empty:
             # Modify display for donations based on user type and anonymous status
             if check_admin_auth():
                 # Admins see all donor names
                 display_df = style_dataframe(df_donations[['donor_name', 'amount', 'date', 'notes']])
             else:
                 # Regular users see anonymous names only for anonymous donations
-                df_donations['display_name'] = df_donations.apply(
-                    lambda x: get_text('anonymous_donor', st.session_state.language) if x['is_anonymous'] 
-                    else x['donor_name'], axis=1
-                )
+                df_donations = df_donations.assign(display_name=formatting.display_names(
+                    df_donations, get_text('anonymous_donor', st.session_state.language)
+                ))
                 display_df = style_dataframe(df_donations[['display_name', 'amount', 'date', 'notes']])
             
             st.dataframe(display_df, use_container_width=True, hide_index=True)
@@ -241,17 +596,12 @@ def show_dashboard():
         
         # Teacher Salaries
         st.subheader(get_text('teacher_salaries', st.session_state.language))
-        if salaries:
-            df_salaries = pd.DataFrame(salaries)
+        if not df_salaries.empty:
             display_df = style_dataframe(df_salaries[['teacher_name', 'amount', 'date']])
             
             # Teacher-wise summary
-            teacher_summary = df_salaries.groupby('teacher_name')['amount'].sum().reset_index()
-            teacher_summary['amount'] = teacher_summary['amount'].apply(format_currency)
-            
-            # Display summary
-            for teacher, amount in zip(teacher_summary['teacher_name'], teacher_summary['amount']):
-                st.metric(f"Total for {teacher}", amount)
+            for teacher, amount in summary['salaries_by_teacher']:
+                st.metric(f"Total for {teacher}", format_currency(amount))
             
             st.dataframe(display_df, use_container_width=True, hide_index=True)
         else:
@@ -260,17 +610,12 @@ def show_dashboard():
     with col2:
         # Recent Expenses
         st.subheader(get_text('expenses', st.session_state.language))
-        if expenses:
-            df_expenses = pd.DataFrame(expenses)
+        if not df_expenses.empty:
             display_df = style_dataframe(df_expenses[['description', 'amount', 'date', 'category']])
             
             # Category-wise summary
-            category_summary = df_expenses.groupby('category')['amount'].sum().reset_index()
-            category_summary['amount'] = category_summary['amount'].apply(format_currency)
-            
-            # Display category summary
-            for cat, amount in zip(category_summary['category'], category_summary['amount']):
-                st.metric(f"Total {cat}", amount)
+            for cat, amount in summary['expenses_by_category']:
+                st.metric(f"Total {cat}", format_currency(amount))
             
             st.dataframe(display_df, use_container_width=True, hide_index=True)
         else:
@@ -284,17 +629,20 @@ def show_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        num_donors = len(pd.DataFrame(donations)['donor_name'].unique()) if donations else 0
-        st.metric(get_text('num_donors', st.session_state.language), num_donors)
+        st.metric(get_text('num_donors', st.session_state.language), summary['num_donors'])
     with col2:
-        num_teachers = len(pd.DataFrame(salaries)['teacher_name'].unique()) if salaries else 0
-        st.metric(get_text('num_teachers', st.session_state.language), num_teachers)
+        st.metric(get_text('num_teachers', st.session_state.language), summary['num_teachers'])
     with col3:
-        expense_categories = len(pd.DataFrame(expenses)['category'].unique()) if expenses else 0
-        st.metric(get_text('expense_cats', st.session_state.language), expense_categories)
+        st.metric(get_text('expense_cats', st.session_state.language), summary['expense_categories'])
     with col4:
-        current_balance = total_donations - (total_expenses + total_salaries)
-        st.metric(get_text('current_balance', st.session_state.language), format_currency(current_balance))
+        # Over a period the same sum is that period's net flow; only all time gives the balance
+        net = total_donations - (total_expenses + total_salaries)
+        label = 'current_balance' if start is None and end is None else 'period_net'
+        st.metric(get_text(label, st.session_state.language), format_currency(net))
+    
+    if check_admin_auth():
+        query_time = sum(seconds for name, seconds in timings.items() if name != 'total')
+        st.caption(f"Data loaded in {timings['total'] * 1000:.0f} ms ({query_time * 1000:.0f} ms of queries run in parallel)")
 
 def show_donations():
     st.header(get_text('donations', st.session_state.language))
@@ -314,47 +662,114 @@ def show_donations():
                 st.success("Donation added successfully!")
                 st.rerun()
     
-    # Display donations table
-    donations = get_all_donations()
-    if donations:
-        df = pd.DataFrame(donations)
+    # Display donations table, one page at a time, filtered in the database
+    # Visitors can't find or pick out anonymous donations by the donor's name
+    include_anonymous = check_admin_auth()
+    col1, col2 = st.columns(2)
+    with col1:
+        start, end = period_selector("donations", 'last_30_days')
+    with col2:
+        donor = filter_selector("donations", 'donation', get_text('donor_name', st.session_state.language), include_anonymous)
+    df = ledger_page("donations", get_donations_page, search_donations, filters={
+        'start': start, 'end': end, 'donor': donor, 'include_anonymous': include_anonymous,
+    })
+    if not df.empty:
+        
+        # Admins can also edit the whole page as a grid and save every change at once
+        batch_edit = check_admin_auth() and st.toggle(get_text('batch_edit', st.session_state.language), key="donations_batch_edit")
+        if batch_edit:
+            show_batch_editor("donations", df, {
+                'donor_name': st.column_config.TextColumn(required=True),
+                'amount': st.column_config.NumberColumn(min_value=0.0, required=True),
+                'date': st.column_config.DateColumn(required=True),
+                'notes': st.column_config.TextColumn(),
+                'is_anonymous': st.column_config.CheckboxColumn(default=False),
+            })
         
         # Show edit/delete options for admin
-        if check_admin_auth():
+        elif check_admin_auth():
             st.subheader("Edit Donations")
             for index, row in df.iterrows():
-                with st.expander(f"Donation: {row['donor_name']} - ৳{row['amount']:,.2f} ({row['date']})"):
-                    with st.form(f"edit_donation_{row['id']}"):
+                with st.expander(f"Donation: {row['donor_name']} - ৳{row['amount']:,.2f} ({row['date']:%Y-%m-%d})"):
+                    with st.form(f"edit_donation_{int(row['id'])}"):
                         new_donor = st.text_input("Donor Name", row['donor_name'])
                         new_amount = st.number_input("Amount (৳)", value=float(row['amount']), min_value=0.0)
                         new_date = st.date_input("Date", pd.to_datetime(row['date']))
-                        new_notes = st.text_area("Notes", row['notes'] if row['notes'] else "")
-                        new_anonymous = st.checkbox("Anonymous", value=row['is_anonymous'])
+                        new_notes = st.text_area("Notes", row['notes'] if pd.notna(row['notes']) else "")
+                        new_anonymous = st.checkbox("Anonymous", value=bool(row['is_anonymous']))
                         
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.form_submit_button("Update"):
-                                update_donation(row['id'], new_donor, new_amount, new_date, new_notes, new_anonymous)
+                                update_donation(int(row['id']), new_donor, new_amount, new_date, new_notes, new_anonymous)
                                 st.success("Updated successfully!")
                                 st.rerun()
                         with col2:
                             if st.form_submit_button("Delete", type="secondary"):
-                                delete_donation(row['id'])
+                                delete_donation(int(row['id']))
                                 st.success("Deleted successfully!")
                                 st.rerun()
         
         # Display table for all users
-        st.subheader("All Donations")
-        if check_admin_auth():
-            display_columns = ['donor_name', 'amount', 'date', 'notes', 'is_anonymous']
-        else:
-            df['display_name'] = df.apply(
-                lambda x: get_text('anonymous_donor', st.session_state.language) if x['is_anonymous'] 
-                else x['donor_name'], axis=1
-            )
-            display_columns = ['display_name', 'amount', 'date', 'notes']
-        
-        display_df = style_dataframe(df[display_columns])
+        if not batch_edit:
+            st.subheader("All Donations")
+            if check_admin_auth():
+                display_columns = ['donor_name', 'amount', 'date', 'notes', 'is_anonymous']
+            else:
+                df = df.assign(display_name=formatting.display_names(
+                    df, get_text('anonymous_donor', st.session_state.language)
+                ))
+                display_columns = ['display_name', 'amount', 'date', 'notes']
+            
+            display_df = style_dataframe(df[display_columns])
+            st.dataframe(display_df, use_container_width=True, hide_index=True)
+    
+    show_export("donations")
+
+def show_donors():
+    st.header(get_text('donors', st.session_state.language))
+    
+    # Visitors see donors' named gifts only; anonymous gifts are counted but never attributed
+    include_anonymous = check_admin_auth()
+    # Passed in rather than read inside the cached reads, so who counts as lapsed moves on with the date
+    today = datetime.now().date()
+    overview = get_donor_overview(today, include_anonymous)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(get_text('num_donors', st.session_state.language), overview['donors'])
+    with col2:
+        st.metric(get_text('repeat_donors', st.session_state.language), overview['repeat_donors'])
+    with col3:
+        st.metric(get_text('lapsed_donors', st.session_state.language), overview['lapsed'],
+                  help=get_text('lapsed_help', st.session_state.language).format(days=LAPSED_AFTER_DAYS))
+    if not include_anonymous and overview['anonymous_gifts']:
+        st.caption(get_text('anonymous_gifts_note', st.session_state.language).format(
+            count=overview['anonymous_gifts'], total=format_currency(overview['anonymous_total'])
+        ))
+    
+    def reset_cursor():
+        st.session_state.donors_cursor = {}
+    
+    # The leaderboard is read from per-donor rollups, so sorting and paging never scan the donations
+    sorts = list(DONOR_SORTS)
+    sort = st.session_state.get('donor_sort', 'total')
+    column_map = formatting.column_map(st.session_state.language)
+    labels = {column_map[option]: option for option in sorts}
+    col1, col2 = st.columns(2)
+    with col1:
+        selected = st.selectbox(get_text('sort_by', st.session_state.language), options=list(labels.keys()), index=sorts.index(sort))
+    with col2:
+        lapsed_only = st.checkbox(get_text('lapsed_only', st.session_state.language), key="donors_lapsed_only", on_change=reset_cursor)
+    if labels[selected] != sort:
+        st.session_state.donor_sort = labels[selected]
+        reset_cursor()
+        st.rerun()
+    
+    df = ledger_page("donors", lambda page_size, **cursor: get_donor_leaderboard(
+        page_size, today, sort, include_anonymous=include_anonymous, lapsed_only=lapsed_only, **cursor
+    ))
+    if not df.empty:
+        display_df = style_dataframe(df[['donor_name', 'total', 'gifts', 'average', 'first_gift', 'last_gift', 'lapsed']])
         st.dataframe(display_df, use_container_width=True, hide_index=True)
 
 def show_expenses():
@@ -366,46 +781,63 @@ def show_expenses():
             description = st.text_input("Description")
             amount = st.number_input("Amount (৳)", min_value=0.0)
             date = st.date_input("Date")
-            category = st.selectbox("Category", ["Utilities", "Supplies", "Maintenance", "Other"])
+            category = st.selectbox("Category", EXPENSE_CATEGORIES)
             
             if st.form_submit_button("Add Expense"):
                 add_expense(description, amount, date, category)
                 st.success("Expense added successfully!")
                 st.rerun()
     
-    expenses = get_all_expenses()
-    if expenses:
-        df = pd.DataFrame(expenses)
+    col1, col2 = st.columns(2)
+    with col1:
+        start, end = period_selector("expenses", 'last_30_days')
+    with col2:
+        category = filter_selector("expenses", 'expense', get_text('column_category', st.session_state.language))
+    df = ledger_page("expenses", get_expenses_page, search_expenses, filters={'start': start, 'end': end, 'category': category})
+    if not df.empty:
+        
+        # Admins can also edit the whole page as a grid and save every change at once
+        batch_edit = check_admin_auth() and st.toggle(get_text('batch_edit', st.session_state.language), key="expenses_batch_edit")
+        if batch_edit:
+            show_batch_editor("expenses", df, {
+                'description': st.column_config.TextColumn(required=True),
+                'amount': st.column_config.NumberColumn(min_value=0.0, required=True),
+                'date': st.column_config.DateColumn(required=True),
+                'category': st.column_config.SelectboxColumn(options=EXPENSE_CATEGORIES, required=True),
+            })
         
         # Show edit/delete options for admin
-        if check_admin_auth():
+        elif check_admin_auth():
             st.subheader("Edit Expenses")
             for index, row in df.iterrows():
-                with st.expander(f"Expense: {row['description']} - ৳{row['amount']:,.2f} ({row['date']})"):
-                    with st.form(f"edit_expense_{row['id']}"):
+                with st.expander(f"Expense: {row['description']} - ৳{row['amount']:,.2f} ({row['date']:%Y-%m-%d})"):
+                    with st.form(f"edit_expense_{int(row['id'])}"):
                         new_desc = st.text_input("Description", row['description'])
                         new_amount = st.number_input("Amount (৳)", value=float(row['amount']), min_value=0.0)
                         new_date = st.date_input("Date", pd.to_datetime(row['date']))
-                        new_category = st.selectbox("Category", 
-                                                  ["Utilities", "Supplies", "Maintenance", "Other"],
-                                                  index=["Utilities", "Supplies", "Maintenance", "Other"].index(row['category']))
+                        # Rows recorded under a category no longer offered keep it until it is changed
+                        categories = EXPENSE_CATEGORIES if row['category'] in EXPENSE_CATEGORIES else EXPENSE_CATEGORIES + [row['category']]
+                        new_category = st.selectbox("Category", categories, index=categories.index(row['category']))
                         
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.form_submit_button("Update"):
-                                update_expense(row['id'], new_desc, new_amount, new_date, new_category)
+                                update_expense(int(row['id']), new_desc, new_amount, new_date, new_category)
                                 st.success("Updated successfully!")
                                 st.rerun()
                         with col2:
                             if st.form_submit_button("Delete", type="secondary"):
-                                delete_expense(row['id'])
+                                delete_expense(int(row['id']))
                                 st.success("Deleted successfully!")
                                 st.rerun()
         
         # Display table for all users
-        st.subheader("All Expenses")
-        display_df = style_dataframe(df[['description', 'amount', 'date', 'category']])
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        if not batch_edit:
+            st.subheader("All Expenses")
+            display_df = style_dataframe(df[['description', 'amount', 'date', 'category']])
+            st.dataframe(display_df, use_container_width=True, hide_index=True)
+    
+    show_export("expenses")
 
 def show_teacher_salaries():
     st.header(get_text('teacher_salaries', st.session_state.language))
@@ -422,16 +854,29 @@ def show_teacher_salaries():
                 st.success("Salary payment added successfully!")
                 st.rerun()
     
-    salaries = get_teacher_salaries()
-    if salaries:
-        df = pd.DataFrame(salaries)
+    col1, col2 = st.columns(2)
+    with col1:
+        start, end = period_selector("salaries", 'last_30_days')
+    with col2:
+        teacher = filter_selector("salaries", 'salary', get_text('column_teacher_name', st.session_state.language))
+    df = ledger_page("salaries", get_salaries_page, search_salaries, filters={'start': start, 'end': end, 'teacher': teacher})
+    if not df.empty:
+        
+        # Admins can also edit the whole page as a grid and save every change at once
+        batch_edit = check_admin_auth() and st.toggle(get_text('batch_edit', st.session_state.language), key="salaries_batch_edit")
+        if batch_edit:
+            show_batch_editor("salaries", df, {
+                'teacher_name': st.column_config.TextColumn(required=True),
+                'amount': st.column_config.NumberColumn(min_value=0.0, required=True),
+                'date': st.column_config.DateColumn(required=True),
+            })
         
         # Show edit/delete options for admin
-        if check_admin_auth():
+        elif check_admin_auth():
             st.subheader("Edit Salary Payments")
             for index, row in df.iterrows():
-                with st.expander(f"Salary: {row['teacher_name']} - ৳{row['amount']:,.2f} ({row['date']})"):
-                    with st.form(f"edit_salary_{row['id']}"):
+                with st.expander(f"Salary: {row['teacher_name']} - ৳{row['amount']:,.2f} ({row['date']:%Y-%m-%d})"):
+                    with st.form(f"edit_salary_{int(row['id'])}"):
                         new_teacher = st.text_input("Teacher Name", row['teacher_name'])
                         new_amount = st.number_input("Amount (৳)", value=float(row['amount']), min_value=0.0)
                         new_date = st.date_input("Date", pd.to_datetime(row['date']))
@@ -439,19 +884,52 @@ def show_teacher_salaries():
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.form_submit_button("Update"):
-                                update_salary(row['id'], new_teacher, new_amount, new_date)
+                                update_salary(int(row['id']), new_teacher, new_amount, new_date)
                                 st.success("Updated successfully!")
                                 st.rerun()
                         with col2:
                             if st.form_submit_button("Delete", type="secondary"):
-                                delete_salary(row['id'])
+                                delete_salary(int(row['id']))
                                 st.success("Deleted successfully!")
                                 st.rerun()
         
         # Display table for all users
-        st.subheader("All Salary Payments")
-        display_df = style_dataframe(df[['teacher_name', 'amount', 'date']])
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        if not batch_edit:
+            st.subheader("All Salary Payments")
+            display_df = style_dataframe(df[['teacher_name', 'amount', 'date']])
+            st.dataframe(display_df, use_container_width=True, hide_index=True)
+    
+    show_export("salaries")
+
+def show_cash_flow():
+    st.header(get_text('cash_flow', st.session_state.language))
+    
+    # Defaults to the last 30 days; balances before the range come from the monthly checkpoints
+    start, end = period_selector("cash_flow", 'last_30_days', open_ended=False)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(get_text('opening_balance', st.session_state.language),
+                  format_currency(get_balance_as_of(start - timedelta(days=1))))
+    with col2:
+        st.metric(get_text('closing_balance', st.session_state.language), format_currency(get_balance_as_of(end)))
+    
+    df = get_cash_flow(start, end)
+    if df.empty:
+        st.info(get_text('no_cash_flow', st.session_state.language))
+        return
+    
+    kinds = {
+        'donation': get_text('donations', st.session_state.language),
+        'expense': get_text('expenses', st.session_state.language),
+        'salary': get_text('teacher_salaries', st.session_state.language),
+    }
+    df = df.assign(kind=df['kind'].map(kinds))
+    if not check_admin_auth():
+        df = df.assign(party=df['party'].mask(df['is_anonymous'], get_text('anonymous_donor', st.session_state.language)))
+    
+    display_df = style_dataframe(df[['date', 'kind', 'party', 'amount', 'balance']])
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
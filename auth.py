@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+from database import get_secret, verify_admin
+
+# Admin sessions are signed tokens carrying their expiry and client, checked by HMAC instead of bcrypt on each rerun
+TOKEN_TTL_SECONDS = 8 * 60 * 60
+
+# Failed logins allowed per window, per username+client and per username alone, checked before bcrypt;
+# clients that logged in as the user within TOKEN_TTL_SECONDS are exempt from the username-wide cap
+MAX_FAILURES_PER_CLIENT = 5
+MAX_FAILURES_PER_USERNAME = 20
+FAILURE_WINDOW_SECONDS = 5 * 60
+MAX_TRACKED_KEYS = 10_000
+
+# Without a configured SESSION_SECRET, tokens are only valid until the process restarts
+_secret_key = (get_secret("SESSION_SECRET", "") or secrets.token_hex(32)).encode('utf-8')
+
+_lock = threading.Lock()
+_failures = defaultdict(deque)
+_not_before = {}
+# (username, client) -> time of its last successful login
+_known_clients = {}
+
+def _sign(payload: str) -> str:
+    return hmac.new(_secret_key, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def _client_tag(client: str) -> str:
+    return _sign(f"client:{client}")[:16]
+
+def issue_token(username: str, client: str, ttl: int = TOKEN_TTL_SECONDS) -> str:
+    payload = f"{username}|{int(time.time()) + ttl}|{int(time.time())}|{_client_tag(client)}"
+    encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+    return f"{encoded}.{_sign(payload)}"
+
+def verify_token(token: Optional[str], client: str) -> Optional[str]:
+    """The username a valid, unexpired token was issued for, or None"""
+    if not token or '.' not in token:
+        return None
+    encoded, signature = token.rsplit('.', 1)
+    try:
+        payload = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8')
+        username, expires, issued, client_tag = payload.rsplit('|', 3)
+        expires, issued = int(expires), int(issued)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    if expires < time.time() or not hmac.compare_digest(client_tag, _client_tag(client)):
+        return None
+    if issued < _not_before.get(username, 0):
+        return None
+    return username
+
+def revoke_tokens(username: str):
+    """Invalidate every token issued to `username` so far, e.g. after a password change"""
+    with _lock:
+        _not_before[username] = int(time.time()) + 1
+
+def _recent_failures(key) -> deque:
+    failures = _failures.get(key, deque())
+    cutoff = time.time() - FAILURE_WINDOW_SECONDS
+    while failures and failures[0] < cutoff:
+        failures.popleft()
+    if not failures:
+        _failures.pop(key, None)
+    return failures
+
+def _is_known(username: str, client: str) -> bool:
+    return _known_clients.get((username, client), 0) > time.time() - TOKEN_TTL_SECONDS
+
+def login_retry_after(username: str, client: str) -> int:
+    """Seconds until `username` may try again from `client`; 0 if not throttled"""
+    with _lock:
+        limits = [((username, client), MAX_FAILURES_PER_CLIENT)]
+        if not _is_known(username, client):
+            limits.append((username, MAX_FAILURES_PER_USERNAME))
+        waits = []
+        for key, limit in limits:
+            failures = _recent_failures(key)
+            if len(failures) >= limit:
+                waits.append(failures[0] + FAILURE_WINDOW_SECONDS - time.time())
+        return int(max(waits)) + 1 if waits else 0
+
+def record_login_failure(username: str, client: str):
+    with _lock:
+        now = time.time()
+        _failures[(username, client)].append(now)
+        _failures[username].append(now)
+        # Forget keys whose failures have all aged out, so sprayed usernames can't grow this without bound
+        if len(_failures) > MAX_TRACKED_KEYS:
+            for key in list(_failures):
+                _recent_failures(key)
+
+def login(username: str, password: str, client: str) -> Optional[str]:
+    """Check the credentials and return a session token, or None if they are wrong or the caller is throttled"""
+    if login_retry_after(username, client):
+        return None
+    if not verify_admin(username, password):
+        record_login_failure(username, client)
+        return None
+    with _lock:
+        _failures.pop((username, client), None)
+        _known_clients[(username, client)] = time.time()
+        if len(_known_clients) > MAX_TRACKED_KEYS:
+            for key in [key for key in _known_clients if not _is_known(*key)]:
+                del _known_clients[key]
+    return issue_token(username, client)
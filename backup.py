@@ -0,0 +1,363 @@
+"""Parallel, compressed, incremental backups of the ledgers and admin accounts, and restore from them.
+
+    python backup.py backup backups/          # full the first time, then only the changes
+    python backup.py backup backups/ --full
+    python backup.py list backups/
+    python backup.py restore backups/20250101T180000000000Z --replace
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, LargeBinary, TypeDecorator, delete, func, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import engine, init_db, raw_money, rebuild_donor_rollups, rebuild_monthly_rollups
+from migrate_data import checksum_query, reset_sequences, table_checksums
+from models import AdminUser, DeletedRow, Donation, Expense, Money, Salary
+from replica import SYNC_OVERLAP
+
+# A snapshot is a directory named after its UTC start time with one gzipped CSV per table and a manifest;
+# incremental ones hold the ledger rows updated and deleted since the previous snapshot
+LEDGERS = [Donation, Expense, Salary]
+TABLES = LEDGERS + [AdminUser]
+MANIFEST = 'manifest.json'
+
+# Level 1 is about three times faster than gzip's default and only ~15% larger on these CSVs
+COMPRESS_LEVEL = 1
+CHUNK_SIZE = 10_000
+
+# NULL is written as \N, not an empty field, so empty strings survive the round trip
+NULL = '\\N'
+COPY_OPTIONS = "FORMAT csv, HEADER, NULL '\\N'"
+
+# How the snapshot files hold amounts; ones from before it was recorded hold float taka
+MONEY_FORMAT = 'poisha'
+
+def _now() -> datetime:
+    """The database's clock, the one that stamps updated_at"""
+    with engine.connect() as connection:
+        return connection.execute(select(type_coerce(func.now(), Donation.__table__.c.updated_at.type))).scalar()
+
+def list_snapshots(directory: str) -> list:
+    """The manifests of the snapshots in `directory`, oldest first"""
+    manifests = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name, MANIFEST)
+            if os.path.exists(path):
+                with open(path) as f:
+                    manifests.append(json.load(f))
+    return manifests
+
+def _chain(directory: str, name: str) -> list:
+    """Manifests from the full snapshot `name` builds on through `name` itself"""
+    manifests = {manifest['name']: manifest for manifest in list_snapshots(directory)}
+    chain = []
+    while name is not None:
+        if name not in manifests:
+            raise FileNotFoundError(f"Snapshot {name} is missing from {directory}")
+        chain.append(manifests[name])
+        name = manifests[name]['base']
+    return chain[::-1]
+
+def _jobs(since: Optional[datetime]) -> list:
+    """(table, SQLAlchemy query) for each file of a snapshot taken since `since` (None for full)"""
+    jobs = []
+    for model in TABLES:
+        table = model.__table__
+        query = select(table).order_by(table.c.id)
+        if since is not None and model in LEDGERS:
+            query = query.where(table.c.updated_at > since)
+        # Amounts are written as the whole poisha stored, as COPY writes them
+        jobs.append((table, raw_money(query)[0]))
+    if since is not None:
+        table = DeletedRow.__table__
+        jobs.append((table, select(table).where(table.c.deleted_at > since).order_by(table.c.id)))
+    return jobs
+
+def _text(value) -> str:
+    """`value` as Postgres' COPY writes it in CSV, so either kind of backup restores into either database"""
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, bytes):
+        return '\\x' + value.hex()
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return str(value)
+
+def _parser(column):
+    if isinstance(column.type, Money):
+        # Whole poisha in the file; the insert converts the taka back to exactly those
+        return lambda text: int(text) / 100
+    column_type = column.type.impl if isinstance(column.type, TypeDecorator) else column.type
+    if isinstance(column_type, Boolean):
+        return lambda text: text in ('t', 'true')
+    if isinstance(column_type, Integer):
+        return int
+    if isinstance(column_type, Float):
+        return float
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat
+    if isinstance(column_type, Date):
+        return date.fromisoformat
+    if isinstance(column_type, LargeBinary):
+        return lambda text: bytes.fromhex(text[2:])
+    return str
+
+def _read_rows(path: str, table):
+    """Rows of a snapshot file as dicts of typed values, CHUNK_SIZE at a time"""
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        parsers = [_parser(table.c[name]) for name in header]
+        chunk = []
+        for record in reader:
+            chunk.append({name: parse(text) if text != NULL else None for name, parse, text in zip(header, parsers, record)})
+            if len(chunk) == CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def _dump_postgres(jobs, folder: str, workers: int):
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        cursor.execute("SELECT pg_export_snapshot(), now()")
+        snapshot, until = cursor.fetchone()
+        checksums = {}
+        for model in LEDGERS:
+            compiled = checksum_query(model).compile(engine)
+            cursor.execute(str(compiled), compiled.params)
+            count, total = cursor.fetchone()
+            checksums[model.__tablename__] = (count, int(total))
+
+        def dump(job):
+            table, query = job
+            started = time.perf_counter()
+            worker = engine.raw_connection()
+            try:
+                worker_cursor = worker.cursor()
+                worker_cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                worker_cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+                compiled = query.compile(engine)
+                sql = worker_cursor.mogrify(str(compiled), compiled.params).decode()
+                path = os.path.join(folder, f"{table.name}.csv.gz")
+                with gzip.open(path, 'wb', compresslevel=COMPRESS_LEVEL) as out:
+                    worker_cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH ({COPY_OPTIONS})", out)
+                rows = worker_cursor.rowcount
+                worker.rollback()
+            finally:
+                worker.close()
+            return table.name, rows, path, time.perf_counter() - started
+
+        # The exporting transaction stays open until every worker has read its table
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(dump, jobs))
+        connection.rollback()
+    finally:
+        connection.close()
+    return until, checksums, results
+
+def _dump_generic(jobs, folder: str, workers: int):
+    # Without exported snapshots the tables are read side by side in separate transactions
+    until = _now()
+    checksums = table_checksums(engine)
+
+    def dump(job):
+        table, query = job
+        started = time.perf_counter()
+        path = os.path.join(folder, f"{table.name}.csv.gz")
+        rows = 0
+        with engine.connect() as connection, gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=COMPRESS_LEVEL) as out:
+            writer = csv.writer(out)
+            writer.writerow([column.name for column in table.columns])
+            result = connection.execution_options(stream_results=True, yield_per=CHUNK_SIZE).execute(query)
+            for chunk in result.partitions():
+                writer.writerows([_text(value) for value in row] for row in chunk)
+                rows += len(chunk)
+        return table.name, rows, path, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(dump, jobs))
+    return until, checksums, results
+
+def backup(directory: str, full: bool = False, workers: int = len(TABLES) + 1, overlap: timedelta = SYNC_OVERLAP) -> dict:
+    """Write a snapshot into `directory`, incremental on the latest one unless `full` or there is none; returns its manifest."""
+    started = time.perf_counter()
+    previous = list_snapshots(directory)
+    base = None if full or not previous else previous[-1]
+    since = datetime.fromisoformat(base['until']) - overlap if base else None
+
+    # Named to the microsecond, so snapshots sort by time; a clock too coarse to tell two apart is read again
+    while True:
+        name = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+        folder = os.path.join(directory, name)
+        try:
+            os.makedirs(folder)
+            break
+        except FileExistsError:
+            continue
+    dump = _dump_postgres if engine.dialect.name == 'postgresql' else _dump_generic
+    until, checksums, results = dump(_jobs(since), folder, workers)
+
+    manifest = {
+        'name': name,
+        'kind': 'incremental' if base else 'full',
+        'base': base['name'] if base else None,
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat(),
+        'dialect': engine.dialect.name,
+        'money': MONEY_FORMAT,
+        'checksums': checksums,
+        'tables': {
+            table: {'file': os.path.basename(path), 'rows': rows, 'bytes': os.path.getsize(path), 'seconds': round(seconds, 3)}
+            for table, rows, path, seconds in results
+        },
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    # Written last, so an interrupted backup leaves no manifest and is never built on or restored
+    with open(os.path.join(folder, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def _load_postgres(table, path: str, replace: bool) -> int:
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+            columns = f.readline().strip()
+        with gzip.open(path, 'rb') as data:
+            if replace:
+                # Truncating in the loading transaction also lets Postgres skip most of the WAL
+                cursor.execute(f"TRUNCATE {table.name}")
+                cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH ({COPY_OPTIONS})", data)
+            else:
+                stage = f"{table.name}_restore"
+                cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {table.name}) ON COMMIT DROP")
+                cursor.copy_expert(f"COPY {stage} ({columns}) FROM STDIN WITH ({COPY_OPTIONS})", data)
+                updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns.split(',') if column != 'id')
+                cursor.execute(
+                    f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {stage} "
+                    f"ON CONFLICT (id) DO UPDATE SET {updates}"
+                )
+        rows = cursor.rowcount
+        connection.commit()
+    finally:
+        connection.close()
+    return rows
+
+def _load_generic(table, path: str, replace: bool) -> int:
+    rows = 0
+    with engine.begin() as connection:
+        if replace:
+            connection.execute(delete(table))
+        for chunk in _read_rows(path, table):
+            if replace:
+                connection.execute(table.insert(), chunk)
+            else:
+                upsert = sqlite_insert(table)
+                upsert = upsert.on_conflict_do_update(
+                    index_elements=['id'], set_={name: upsert.excluded[name] for name in chunk[0] if name != 'id'},
+                )
+                connection.execute(upsert, chunk)
+            rows += len(chunk)
+    return rows
+
+def _apply_deletions(path: str) -> int:
+    tables = {model.__tablename__: model.__table__ for model in LEDGERS}
+    deleted = 0
+    with engine.begin() as connection:
+        for chunk in _read_rows(path, DeletedRow.__table__):
+            for name, table in tables.items():
+                ids = [row['row_id'] for row in chunk if row['table_name'] == name]
+                if ids:
+                    deleted += connection.execute(delete(table).where(table.c.id.in_(ids))).rowcount
+    return deleted
+
+def restore(folder: str, replace: bool = False, workers: int = len(TABLES)) -> bool:
+    """Load the snapshot in `folder` and those it builds on; returns whether the ledgers match the manifest's counts and totals."""
+    directory, name = os.path.split(os.path.normpath(folder))
+    chain = _chain(directory, name)
+    if any(manifest.get('money') != MONEY_FORMAT for manifest in chain):
+        raise SystemExit(f"{name} builds on snapshots holding float taka amounts; restore them with the release that wrote them")
+    # Creates the schema in an empty database; the default admin it may add is replaced by the backed-up ones
+    init_db()
+    if not replace and any(count for count, _ in table_checksums(engine).values()):
+        raise SystemExit("The database already has ledger rows; pass --replace to overwrite them")
+
+    postgres = engine.dialect.name == 'postgresql'
+    load = _load_postgres if postgres else _load_generic
+    # SQLite takes one writer at a time
+    workers = workers if postgres else 1
+    for manifest in chain:
+        started = time.perf_counter()
+        snapshot = os.path.join(directory, manifest['name'])
+        full = manifest['kind'] == 'full'
+        # Every snapshot holds all the admins; the latest ones win
+        models = LEDGERS + [AdminUser] if full or manifest is chain[-1] else LEDGERS
+
+        def load_table(model):
+            table = model.__table__
+            table_started = time.perf_counter()
+            rows = load(table, os.path.join(snapshot, manifest['tables'][table.name]['file']), full or model is AdminUser)
+            return table.name, rows, time.perf_counter() - table_started
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for table, rows, seconds in executor.map(load_table, models):
+                print(f"{manifest['name']} {table}: {rows} rows in {seconds:.2f}s")
+        if 'deletedrow' in manifest['tables']:
+            deleted = _apply_deletions(os.path.join(snapshot, manifest['tables']['deletedrow']['file']))
+            print(f"{manifest['name']}: {deleted} deleted rows removed")
+        print(f"{manifest['name']} ({manifest['kind']}) restored in {time.perf_counter() - started:.2f}s")
+
+    reset_sequences(TABLES)
+    # Rollups are derived data, so compute them from the restored ledgers
+    rebuild_monthly_rollups()
+    rebuild_donor_rollups()
+
+    expected = {table: tuple(value) for table, value in chain[-1]['checksums'].items()}
+    actual = table_checksums(engine)
+    for table, value in expected.items():
+        print(f"{table}: backed up {value[0]} rows / {value[1] / 100:,.2f}, restored {actual[table][0]} rows / "
+              f"{actual[table][1] / 100:,.2f} ... {'OK' if actual[table] == value else 'MISMATCH'}")
+    return actual == expected
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    backup_parser = commands.add_parser("backup", help="Write a snapshot")
+    backup_parser.add_argument("directory")
+    backup_parser.add_argument("--full", action="store_true", help="Copy every row, not just the changes since the last snapshot")
+    backup_parser.add_argument("--workers", type=int, default=len(TABLES) + 1, help="Tables dumped concurrently")
+    list_parser = commands.add_parser("list", help="List the snapshots in a directory")
+    list_parser.add_argument("directory")
+    restore_parser = commands.add_parser("restore", help="Restore a snapshot and those it builds on")
+    restore_parser.add_argument("snapshot", help="Snapshot directory")
+    restore_parser.add_argument("--replace", action="store_true", help="Overwrite ledgers that already have rows")
+    restore_parser.add_argument("--workers", type=int, default=len(TABLES), help="Tables loaded concurrently")
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        manifest = backup(args.directory, args.full, args.workers)
+        for table, info in manifest['tables'].items():
+            print(f"{table}: {info['rows']} rows, {info['bytes'] / 2 ** 20:.1f} MiB in {info['seconds']:.2f}s")
+        print(f"{manifest['kind'].title()} snapshot {manifest['name']} written in {manifest['seconds']:.2f}s")
+    elif args.command == "list":
+        for manifest in list_snapshots(args.directory):
+            rows = sum(info['rows'] for info in manifest['tables'].values())
+            print(f"{manifest['name']}  {manifest['kind']:<11}  {rows:>9} rows  {manifest['seconds']:>7.2f}s"
+                  + (f"  on {manifest['base']}" if manifest['base'] else ""))
+    elif not restore(args.snapshot, args.replace, args.workers):
+        raise SystemExit("Verification failed: row counts or amount totals differ from the backup")
+
+if __name__ == "__main__":
+    main()
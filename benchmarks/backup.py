@@ -0,0 +1,72 @@
+"""Backup and restore timings for backup.py.
+
+Seeds a local database, takes a full backup, changes a share of the rows,
+takes an incremental backup, then wipes the database and restores the
+chain, reporting each step's time and the snapshot sizes:
+
+    python benchmarks/backup.py --url postgresql://localhost/maktab_bench --seed 1000000
+    python benchmarks/backup.py --url sqlite:///bench_maktab.db --seed 100000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_URL = "sqlite:///bench_maktab.db"
+
+def change_rows(database, every: int):
+    """Update every `every`-th row of each ledger and delete 100 others, as a day's edits would"""
+    import backup
+    with database.engine.begin() as connection:
+        for model in backup.LEDGERS:
+            table = model.__table__
+            connection.execute(table.update().where(table.c.id % every == 0).values(amount=table.c.amount + 1))
+    for remove in (database.delete_donation, database.delete_expense, database.delete_salary):
+        for row_id in range(1, 101):
+            remove(row_id * every + 1)
+
+def report(manifest):
+    size = sum(info['bytes'] for info in manifest['tables'].values())
+    rows = sum(info['rows'] for info in manifest['tables'].values())
+    print(f"{manifest['kind']:<12} backup: {rows:>9} rows, {size / 2 ** 20:7.1f} MiB in {manifest['seconds']:7.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help="Local database to benchmark against; it is wiped")
+    parser.add_argument("--seed", type=int, default=100000, help="Rows per ledger")
+    parser.add_argument("--change-every", type=int, default=100, help="Update one row in this many before the incremental backup")
+    parser.add_argument("--dir", help="Where to write the snapshots; a temporary directory by default")
+    args = parser.parse_args()
+
+    # The engine is created when database is imported, so the URL must be in place first
+    os.environ["DATABASE_URL"] = args.url
+    import database
+    import backup
+    from benchmarks.run import reset_database
+    from sqlmodel import SQLModel
+
+    print(f"Seeded {args.seed} rows per ledger in {reset_database(database, args.seed):.1f}s")
+    directory = args.dir or tempfile.mkdtemp(prefix="maktab_backup_")
+    try:
+        report(backup.backup(directory, full=True))
+        change_rows(database, args.change_every)
+        # No overlap: every seeded row is newer than the usual overlap window
+        incremental = backup.backup(directory, overlap=timedelta(0))
+        report(incremental)
+
+        SQLModel.metadata.drop_all(database.engine)
+        started = time.perf_counter()
+        ok = backup.restore(os.path.join(directory, incremental['name']))
+        print(f"restore: {time.perf_counter() - started:.2f}s ({'verified' if ok else 'MISMATCH'})")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
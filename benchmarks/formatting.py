@@ -0,0 +1,78 @@
+"""Row-wise vs vectorised display formatting for ledger tables.
+
+Times the previous style_dataframe/anonymisation code (per-row apply) against
+the helpers in formatting.py on a synthetic donations frame.
+
+    python benchmarks/formatting.py [rows]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import formatting
+from translations import get_text
+
+LANGUAGE = 'bn'
+
+def make_donations(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    donors = [f"Donor {i}" for i in range(max(rows // 20, 1))]
+    return pd.DataFrame({
+        'donor_name': pd.Categorical(rng.choice(donors, rows)),
+        # Mostly round gifts with some arbitrary amounts, as in the real ledger
+        'amount': np.where(rng.random(rows) < 0.8, rng.integers(1, 200, rows) * 50.0, rng.random(rows) * 100_000),
+        'date': pd.to_datetime('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D'),
+        'notes': None,
+        'is_anonymous': rng.random(rows) < 0.1,
+    })
+
+def legacy(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.assign(display_name=df.apply(
+        lambda x: get_text('anonymous_donor', LANGUAGE) if x['is_anonymous'] else x['donor_name'], axis=1
+    ))[['display_name', 'amount', 'date', 'notes']]
+    column_map = {column: get_text(key, LANGUAGE) for column, key in formatting.COLUMN_LABEL_KEYS.items()}
+    df = df.rename(columns={k: v for k, v in column_map.items() if k in df.columns})
+    date_column = get_text('column_date', LANGUAGE)
+    df[date_column] = pd.to_datetime(df[date_column]).dt.strftime('%d %B, %Y')
+    amount_column = get_text('column_amount', LANGUAGE)
+    df[amount_column] = df[amount_column].apply(formatting.format_currency)
+    return df
+
+def vectorised(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.assign(display_name=formatting.display_names(
+        df, get_text('anonymous_donor', LANGUAGE)
+    ))[['display_name', 'amount', 'date', 'notes']]
+    column_map = formatting.column_map(LANGUAGE)
+    df = df.rename(columns={k: v for k, v in column_map.items() if k in df.columns})
+    df[column_map['date']] = formatting.format_dates(df[column_map['date']])
+    df[column_map['amount']] = formatting.format_currency_array(df[column_map['amount']])
+    return df
+
+def best_of(func, df, repeat=3) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_donations(rows)
+    before, after = legacy(df), vectorised(df)
+    assert before.astype(object).equals(after.astype(object)), "outputs differ"
+
+    old, new = best_of(legacy, df), best_of(vectorised, df)
+    print(f"{rows} rows: row-wise {old * 1000:.1f} ms, vectorised {new * 1000:.1f} ms ({old / new:.1f}x)")
+    for name, func in [
+        ("currency", lambda frame: frame['amount'].apply(formatting.format_currency)),
+        ("currency (vectorised)", lambda frame: formatting.format_currency_array(frame['amount'])),
+    ]:
+        print(f"  {name}: {best_of(func, df) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
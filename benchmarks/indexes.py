@@ -0,0 +1,74 @@
+"""Before/after benchmark for the secondary indexes declared in models.py.
+
+Seeds a local database with synthetic ledgers, drops the secondary indexes,
+then times the app's sort and grouping queries and prints their plans, once
+without the indexes and once after creating them.
+
+    python benchmarks/indexes.py                       # local SQLite file
+    python benchmarks/indexes.py postgresql://localhost/maktab_bench 200000
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlmodel import SQLModel
+from models import Donation, Expense, Salary
+from benchmarks.synthetic import seed
+
+QUERIES = {
+    'donations by date': "SELECT * FROM donation ORDER BY date DESC, id DESC LIMIT 25",
+    'donations keyset page': (
+        "SELECT * FROM donation WHERE date < '2020-06-01' OR (date = '2020-06-01' AND id < 1000) "
+        "ORDER BY date DESC, id DESC LIMIT 25"
+    ),
+    'salaries by teacher': "SELECT teacher_name, SUM(amount) FROM salary GROUP BY teacher_name ORDER BY teacher_name",
+    'expenses by category': "SELECT category, SUM(amount) FROM expense GROUP BY category ORDER BY category",
+    'distinct donors': "SELECT COUNT(DISTINCT donor_name) FROM donation",
+}
+
+def explain(conn, sql: str) -> str:
+    if conn.dialect.name == 'sqlite':
+        plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in plan)
+    plan = conn.execute(text(f"EXPLAIN ANALYZE {sql}")).all()
+    return "\n".join(row[0] for row in plan)
+
+def run(engine, label: str, repeat: int = 5):
+    print(f"== {label} ==")
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for name, sql in QUERIES.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql)).all()
+                timings.append(time.perf_counter() - started)
+            print(f"-- {name}: best of {repeat} {min(timings) * 1000:.2f} ms")
+            print("   " + explain(conn, sql).replace("\n", "\n   "))
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "sqlite:///bench_indexes.db"
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    engine = create_engine(url)
+
+    tables = [Donation.__table__, Expense.__table__, Salary.__table__]
+    SQLModel.metadata.drop_all(engine, tables=tables)
+    SQLModel.metadata.create_all(engine, tables=tables)
+    for table in tables:
+        for index in table.indexes:
+            index.drop(engine)
+    seed(engine, rows)
+    print(f"Seeded {rows} rows per ledger on {engine.dialect.name}\n")
+
+    run(engine, "without secondary indexes")
+    for table in tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    print()
+    run(engine, "with secondary indexes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Concurrent-viewer load test for the connection pool.
+
+Runs a growing number of simulated viewers against a database, each
+loading pages back to back with a pause between them, and reports
+throughput, page latency and pool checkout waits at every level. The
+sustained viewer count is the highest level whose p95 checkout wait
+stays under --max-wait-ms with no checkout timeouts.
+
+Pool settings come from the same environment variables as the app:
+
+    python benchmarks/load.py --url sqlite:///bench_maktab.db --seed 100000
+    DB_POOL_SIZE=10 DB_MAX_OVERFLOW=0 python benchmarks/load.py --url postgresql://localhost/maktab_bench
+    DB_POOL_MODE=pgbouncer python benchmarks/load.py --url postgresql://localhost:6432/maktab_bench
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_URL = "sqlite:///bench_maktab.db"
+DEFAULT_VIEWERS = "1,2,4,8,16,32,64"
+
+def page_views(database, cached: bool):
+    """What a viewer's page load runs: the dashboard's parallel fetch, or one ledger page read in the session's own thread"""
+    read = (lambda func: func) if cached else (lambda func: func.__wrapped__)
+
+    def dashboard():
+        database.fetch_concurrently({
+            'summary': read(database.get_dashboard_summary),
+            'trends': lambda: read(database.get_time_series)('month'),
+            'donations': lambda: read(database.get_donations_df)(limit=50),
+            'expenses': lambda: read(database.get_expenses_df)(limit=50),
+            'salaries': lambda: read(database.get_salaries_df)(limit=50),
+        })
+
+    return [
+        dashboard,
+        lambda: read(database.get_donations_page)(25),
+        lambda: read(database.get_expenses_page)(25),
+        lambda: read(database.get_salaries_page)(25),
+    ]
+
+def run_level(database, viewers: int, duration: float, think: float, cached: bool) -> dict:
+    from diagnostics import get_diagnostics, reset_diagnostics
+
+    pages = page_views(database, cached)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def viewer(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            try:
+                rng.choice(pages)()
+            except Exception as error:
+                with lock:
+                    errors.append(error)
+            else:
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            time.sleep(rng.uniform(0, 2 * think))
+
+    reset_diagnostics()
+    timeouts_before = database.get_pool_status()['timeouts'] or 0
+    threads = [threading.Thread(target=viewer, args=(seed,)) for seed in range(viewers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pool_wait = get_diagnostics()['pool_wait']
+    latencies.sort()
+    return {
+        'viewers': viewers,
+        'views_per_s': len(latencies) / duration,
+        'page_p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'page_p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        'wait_p95_ms': pool_wait['p95_ms'],
+        'wait_max_ms': pool_wait['max_ms'],
+        'timeouts': (database.get_pool_status()['timeouts'] or 0) - timeouts_before,
+        'errors': len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help="Database to load; only read unless --seed is given")
+    parser.add_argument("--seed", type=int, help="Wipe the database and seed this many rows per ledger first")
+    parser.add_argument("--viewers", default=DEFAULT_VIEWERS, help="Comma-separated concurrent viewer counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean pause between a viewer's page loads, in seconds")
+    parser.add_argument("--max-wait-ms", type=float, default=50.0, help="p95 checkout wait a level may reach and still count as sustained")
+    parser.add_argument("--cached", action="store_true", help="Go through the read cache, as repeat views do")
+    args = parser.parse_args()
+
+    # The engine is created when database is imported, so the URL must be in place first
+    os.environ["DATABASE_URL"] = args.url
+    import database
+    from db_config import POOL_CONFIG, POOL_MODE
+
+    if args.seed:
+        from benchmarks.run import reset_database
+        print(f"Seeded {args.seed} rows per ledger in {reset_database(database, args.seed):.1f}s")
+    else:
+        database.ensure_initialized()
+
+    settings = {key: value for key, value in POOL_CONFIG.items() if key != 'poolclass'}
+    print(f"Pool mode {POOL_MODE} {settings}, think time {args.think}s, {'cached' if args.cached else 'uncached'} reads")
+    print(f"{'viewers':>8} {'views/s':>9} {'page p50':>10} {'page p95':>10} {'wait p95':>10} {'wait max':>10} {'timeouts':>9} {'errors':>7}")
+    sustained = 0
+    for viewers in [int(count) for count in args.viewers.split(',')]:
+        result = run_level(database, viewers, args.duration, args.think, args.cached)
+        print(f"{viewers:>8} {result['views_per_s']:>9.1f} {result['page_p50_ms']:>8.1f}ms {result['page_p95_ms']:>8.1f}ms "
+              f"{result['wait_p95_ms']:>8.1f}ms {result['wait_max_ms']:>8.1f}ms {result['timeouts']:>9} {result['errors']:>7}")
+        if result['wait_p95_ms'] <= args.max_wait_ms and not result['timeouts'] and not result['errors']:
+            sustained = viewers
+    print(f"Sustained {sustained} concurrent viewers with p95 checkout wait under {args.max_wait_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
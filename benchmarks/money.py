@@ -0,0 +1,56 @@
+"""Float taka vs whole-poisha amounts: drift and speed of summing them.
+
+Loads the same synthetic amounts, with paisa, into an in-memory SQLite
+table as float taka (the old column) and as BIGINT poisha (models.Money),
+then times SUM in SQL and in pandas for both and reports how far each float
+total drifts from the exact one.
+
+    python benchmarks/money.py [rows]
+"""
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+def make_poisha(rows: int) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    # Mostly round gifts with some arbitrary amounts, as in the real ledger
+    return np.where(rng.random(rows) < 0.8, rng.integers(1, 200, rows) * 5000, rng.integers(1, 10_000_000, rows))
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    poisha = make_poisha(rows)
+    taka = poisha / 100
+    exact = int(poisha.sum())
+
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE ledger (taka FLOAT NOT NULL, poisha BIGINT NOT NULL)')
+    connection.executemany('INSERT INTO ledger VALUES (?, ?)', zip(taka.tolist(), poisha.tolist()))
+
+    cases = [
+        ('SQL SUM(float taka)', lambda: connection.execute('SELECT SUM(taka) FROM ledger').fetchone()[0] * 100),
+        ('SQL SUM(bigint poisha)', lambda: connection.execute('SELECT SUM(poisha) FROM ledger').fetchone()[0]),
+        ('Python sum(float taka)', lambda: sum(taka.tolist()) * 100),
+        ('pandas float64 taka', lambda: pd.Series(taka).sum() * 100),
+        ('pandas int64 poisha', lambda: pd.Series(poisha).sum()),
+    ]
+    print(f"{rows} amounts, exact total {exact / 100:,.2f}")
+    for name, func in cases:
+        seconds, total = best_of(func)
+        print(f"  {name:<24} {seconds * 1000:9.2f} ms   off by {abs(total - exact):.6f} poisha")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Benchmark harness for the data layer and the app's pages.
+
+Points database.engine at a local stand-in database (a SQLite file by
+default, or any SQLAlchemy URL such as a local Postgres), seeds it with
+synthetic ledgers at each requested size, times every function in
+database.py plus a headless run of each page, and writes the results as
+JSON so two runs can be diffed.
+
+    python benchmarks/run.py --sizes 1000,100000 --output bench_results.json
+    python benchmarks/run.py --url postgresql://localhost/maktab_bench
+    python benchmarks/run.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_URL = "sqlite:///bench_maktab.db"
+DEFAULT_SIZES = "1000,100000,1000000"
+PAGES = ["Dashboard", "Donations", "Donors", "Expenses", "Teacher Salaries", "Cash Flow"]
+
+def measure(func, repeat: int, cleanup=None) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+        if cleanup:
+            cleanup()
+    return {'best_s': min(timings), 'median_s': statistics.median(timings), 'repeat': repeat}
+
+def read_benchmarks(database):
+    """(name, function) for every read path; cached functions are timed uncached through __wrapped__"""
+    import exporter
+
+    deep_cursor = (date(2019, 12, 31), 10 ** 12)
+
+    def export(fmt, start=None, end=None):
+        with tempfile.TemporaryFile() as out:
+            exporter.export_ledger('donations', fmt, out, start, end)
+
+    return [
+        ('get_all_donations', database.get_all_donations),
+        ('get_all_expenses', database.get_all_expenses),
+        ('get_teacher_salaries', database.get_teacher_salaries),
+        ('get_donations_df', database.get_donations_df),
+        ('get_expenses_df', database.get_expenses_df),
+        ('get_salaries_df', database.get_salaries_df),
+        ('get_donations_df(limit=50)', lambda: database.get_donations_df.__wrapped__(limit=50)),
+        ('get_donations_page', lambda: database.get_donations_page.__wrapped__(25)),
+        ('get_donations_page(deep)', lambda: database.get_donations_page.__wrapped__(25, after=deep_cursor)),
+        ('get_expenses_page', lambda: database.get_expenses_page.__wrapped__(25)),
+        ('get_salaries_page', lambda: database.get_salaries_page.__wrapped__(25)),
+        ('get_dashboard_summary', database.get_dashboard_summary),
+        ('get_dashboard_summary(fiscal year)', lambda: database.get_dashboard_summary.__wrapped__(date(2022, 7, 1), date(2023, 6, 30))),
+        ('get_dashboard_summary(30 days)', lambda: database.get_dashboard_summary.__wrapped__(date(2023, 6, 10), date(2023, 7, 9))),
+        ('get_donations_page(30 days)', lambda: database.get_donations_page.__wrapped__(25, start=date(2023, 6, 1), end=date(2023, 6, 30))),
+        ('get_donations_page(one donor)', lambda: database.get_donations_page.__wrapped__(25, donor="Donor 12")),
+        ('get_expenses_df(category, one year)', lambda: database.get_expenses_df.__wrapped__(
+            start=date(2023, 1, 1), end=date(2023, 12, 31), category="Utilities")),
+        ('get_filter_values', lambda: database.get_filter_values.__wrapped__('donation')),
+        ('get_monthly_rollups', database.get_monthly_rollups),
+        ('get_time_series', database.get_time_series),
+        ('get_balance_checkpoints', database.get_balance_checkpoints),
+        ('get_balance_as_of', lambda: database.get_balance_as_of.__wrapped__(date(2023, 6, 15))),
+        ('get_cash_flow(30 days)', lambda: database.get_cash_flow.__wrapped__(date(2023, 6, 1), date(2023, 6, 30))),
+        ('get_time_series(day, 90 days)', lambda: database.get_time_series.__wrapped__('day', date(2023, 1, 1), date(2023, 3, 31))),
+        ('search_donations(broad)', lambda: database.search_donations.__wrapped__("donor", 25)),
+        ('search_donations(name)', lambda: database.search_donations.__wrapped__("Donor 12", 25)),
+        ('search_donations(misspelt)', lambda: database.search_donations.__wrapped__("ramadn apeal", 25, include_anonymous=False)),
+        ('search_donations(no match)', lambda: database.search_donations.__wrapped__("zzzz", 25)),
+        ('search_expenses', lambda: database.search_expenses.__wrapped__("synthetic 42", 25)),
+        ('search_salaries', lambda: database.search_salaries.__wrapped__("teacher", 25)),
+        ('get_donor_leaderboard', lambda: database.get_donor_leaderboard.__wrapped__(25, date.today())),
+        ('get_donor_leaderboard(last_gift, public)', lambda: database.get_donor_leaderboard.__wrapped__(
+            25, date.today(), 'last_gift', include_anonymous=False)),
+        ('get_donor_overview', lambda: database.get_donor_overview.__wrapped__(date.today())),
+        ('export_ledger(csv)', lambda: export('csv')),
+        ('export_ledger(parquet)', lambda: export('parquet')),
+        ('export_ledger(xlsx, one year)', lambda: export('xlsx', date(2023, 1, 1), date(2023, 12, 31))),
+        ('verify_admin', lambda: database.verify_admin("admin", "admin123")),
+    ]
+
+def write_benchmarks(database):
+    """(name, function[, untimed cleanup]) tuples that each leave the ledgers as they found them"""
+    from sqlalchemy import delete, func
+    from sqlmodel import Session, select
+    from benchmarks.synthetic import donation_rows
+    from models import Donation, Expense, Salary
+
+    def add_update_delete(add, update, delete, model, values):
+        add(*values)
+        with Session(database.engine) as session:
+            latest = session.exec(select(model).order_by(model.id.desc()).limit(1)).first()
+        update(latest.id, *values)
+        delete(latest.id)
+
+    today = date.today()
+    bulk_rows = list(donation_rows(random.Random(7), 1000, 50))
+    with Session(database.engine) as session:
+        last_id = session.exec(select(func.coalesce(func.max(Donation.id), 0))).one()
+        # Rewritten with their own values, so the batch edit leaves them as they were
+        latest = {row.id: {'amount': row.amount, 'date': row.date} for row in
+                  session.exec(select(Donation).order_by(Donation.id.desc()).limit(20))}
+
+    def remove_bulk_rows():
+        with database.engine.begin() as connection:
+            connection.execute(delete(Donation.__table__).where(Donation.id > last_id))
+        database.rebuild_monthly_rollups()
+        database.rebuild_donor_rollups()
+
+    return [
+        ('add/update/delete_donation', lambda: add_update_delete(
+            database.add_donation, database.update_donation, database.delete_donation, Donation,
+            ("Bench donor", 500.0, today, "bench", False))),
+        ('add/update/delete_expense', lambda: add_update_delete(
+            database.add_expense, database.update_expense, database.delete_expense, Expense,
+            ("Bench expense", 500.0, today, "Other"))),
+        ('add/update/delete_salary', lambda: add_update_delete(
+            database.add_salary, database.update_salary, database.delete_salary, Salary,
+            ("Bench teacher", 500.0, today))),
+        ('bulk_insert(1000)', lambda: database.bulk_insert(Donation, bulk_rows), remove_bulk_rows),
+        ('apply_changes(20 updates)', lambda: database.apply_changes(Donation, updated=latest)),
+        ('rebuild_monthly_rollups', database.rebuild_monthly_rollups),
+        ('rebuild_donor_rollups', database.rebuild_donor_rollups),
+    ]
+
+def page_benchmarks(timeout: float):
+    """Headless runs of each page through Streamlit's AppTest, as an admin so every code path renders"""
+    from streamlit.testing.v1 import AppTest
+    import auth
+    import cache
+
+    def run_page(page, cold):
+        app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+        app.session_state['auth_token'] = auth.issue_token("admin", "unknown")
+        app.run()
+        if cold:
+            cache.clear_cache()
+        started = time.perf_counter()
+        if page == "Dashboard":
+            app.run()
+        else:
+            next(box for box in app.selectbox if box.label == "Select Page").select(page).run()
+        elapsed = time.perf_counter() - started
+        if app.exception:
+            raise RuntimeError(f"{page} raised: {app.exception[0].value}")
+        return elapsed
+
+    benchmarks = []
+    for page in PAGES:
+        benchmarks.append((f"page:{page}", lambda page=page: run_page(page, cold=True)))
+        benchmarks.append((f"page:{page}(cached)", lambda page=page: run_page(page, cold=False)))
+    return benchmarks
+
+def measure_pages(benchmarks, repeat: int) -> list:
+    # The page runs time themselves so AppTest's own setup is excluded
+    results = []
+    for name, func in benchmarks:
+        timings = [func() for _ in range(repeat)]
+        results.append((name, {'best_s': min(timings), 'median_s': statistics.median(timings), 'repeat': repeat}))
+    return results
+
+def reset_database(database, rows: int):
+    from sqlmodel import SQLModel
+    from benchmarks.synthetic import seed
+    import cache
+
+    SQLModel.metadata.drop_all(database.engine)
+    database.init_db()
+    started = time.perf_counter()
+    seed(database.engine, rows)
+    database.rebuild_monthly_rollups()
+    database.rebuild_donor_rollups()
+    cache.clear_cache()
+    return time.perf_counter() - started
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(args) -> dict:
+    # The engine is created when database is imported, so the URL must be in place first
+    os.environ["DATABASE_URL"] = args.url
+    import database
+    from sqlalchemy.engine import make_url
+
+    only = re.compile(args.only) if args.only else None
+    report = {
+        'meta': {
+            'url': make_url(args.url).render_as_string(hide_password=True),
+            'dialect': database.engine.dialect.name,
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': [],
+    }
+
+    for rows in [int(size) for size in args.sizes.split(',')]:
+        seconds = reset_database(database, rows)
+        print(f"Seeded {rows} rows per ledger in {seconds:.1f}s")
+
+        timed = []
+        for name, func in read_benchmarks(database):
+            if only and not only.search(name):
+                continue
+            uncached = getattr(func, '__wrapped__', func)
+            timed.append((name, measure(uncached, args.repeat)))
+            if uncached is not func:
+                func()
+                timed.append((f"{name}(cached)", measure(func, args.repeat)))
+        for name, func, *cleanup in write_benchmarks(database):
+            if not only or only.search(name):
+                timed.append((name, measure(func, args.repeat, *cleanup)))
+        if not args.skip_pages:
+            pages = [(name, func) for name, func in page_benchmarks(args.page_timeout) if not only or only.search(name)]
+            timed.extend(measure_pages(pages, args.repeat))
+
+        for name, result in timed:
+            report['results'].append({'rows': rows, 'name': name, **result})
+            print(f"  {name:<40} best {result['best_s'] * 1000:10.2f} ms   median {result['median_s'] * 1000:10.2f} ms")
+    return report
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = {(r['rows'], r['name']): r for r in json.load(f)['results']}
+    with open(after_path) as f:
+        after = {(r['rows'], r['name']): r for r in json.load(f)['results']}
+    print(f"{'rows':>8}  {'benchmark':<40} {'before ms':>12} {'after ms':>12} {'change':>8}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key]['median_s'], after[key]['median_s']
+        print(f"{key[0]:>8}  {key[1]:<40} {old * 1000:12.2f} {new * 1000:12.2f} {new / old if old else float('inf'):7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help="Local database to benchmark against; it is wiped")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated rows per ledger")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="Regex selecting benchmarks by name")
+    parser.add_argument("--skip-pages", action="store_true", help="Skip the headless page runs")
+    parser.add_argument("--page-timeout", type=float, default=600.0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Diff two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
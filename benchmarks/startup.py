@@ -0,0 +1,37 @@
+"""Cold-start cost of the app's modules.
+
+Each measurement runs in a fresh interpreter, so nothing is warm in
+sys.modules. Point DATABASE_URL at a local database (e.g. sqlite:///bench.db)
+unless you want to include the Supabase round-trips.
+
+    DATABASE_URL=sqlite:///bench_startup.db python benchmarks/startup.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 5
+
+STEPS = {
+    'import database': "import database",
+    'import app': "import app",
+    'import app + first database use': "import app, database; database.ensure_initialized()",
+}
+
+def cold_run(code: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+def main():
+    baseline = cold_run("pass")
+    print(f"interpreter start: {baseline * 1000:.0f} ms (subtracted below)")
+    for name, code in STEPS.items():
+        timings = [cold_run(code) - baseline for _ in range(REPEAT)]
+        print(f"{name:<36} median {statistics.median(timings) * 1000:7.0f} ms   best {min(timings) * 1000:7.0f} ms")
+
+if __name__ == "__main__":
+    main()
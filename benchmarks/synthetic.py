@@ -0,0 +1,68 @@
+"""Synthetic ledger data for benchmarks.
+
+The distributions roughly follow the real maktab ledgers: many small
+donors giving mostly round amounts, a handful of expense categories and a
+few dozen teachers paid monthly.
+"""
+import random
+from datetime import date, timedelta
+from sqlalchemy import insert
+from models import Donation, Expense, Salary
+
+BATCH_SIZE = 10_000
+START_DATE = date(2015, 1, 1)
+DAYS = 3650
+CATEGORIES = ["Utilities", "Supplies", "Maintenance", "Other"]
+
+def _amount(rng: random.Random, low: int, high: int) -> float:
+    # Four in five amounts are round multiples of 50
+    if rng.random() < 0.8:
+        return float(rng.randrange(low // 50 + 1, high // 50 + 1) * 50)
+    return round(rng.uniform(low, high), 2)
+
+def donation_rows(rng: random.Random, count: int, donors: int):
+    for _ in range(count):
+        yield {
+            'donor_name': f"Donor {rng.randrange(donors)}",
+            'amount': _amount(rng, 100, 50_000),
+            'date': START_DATE + timedelta(days=rng.randrange(DAYS)),
+            'notes': rng.choice([None, None, None, "Monthly sadaqah", "Zakat", "Ramadan appeal"]),
+            'is_anonymous': rng.random() < 0.1,
+        }
+
+def expense_rows(rng: random.Random, count: int):
+    for _ in range(count):
+        yield {
+            'description': f"Synthetic expense {rng.randrange(1000)}",
+            'amount': _amount(rng, 100, 20_000),
+            'date': START_DATE + timedelta(days=rng.randrange(DAYS)),
+            'category': rng.choice(CATEGORIES),
+        }
+
+def salary_rows(rng: random.Random, count: int, teachers: int = 40):
+    for _ in range(count):
+        yield {
+            'teacher_name': f"Teacher {rng.randrange(teachers)}",
+            'amount': _amount(rng, 5_000, 30_000),
+            'date': START_DATE + timedelta(days=rng.randrange(DAYS)),
+        }
+
+def seed(engine, rows: int, seed: int = 42):
+    """Insert `rows` synthetic rows into each ledger with batched Core inserts"""
+    rng = random.Random(seed)
+    donors = max(rows // 20, 1)
+    generators = [
+        (Donation, donation_rows(rng, rows, donors)),
+        (Expense, expense_rows(rng, rows)),
+        (Salary, salary_rows(rng, rows)),
+    ]
+    with engine.begin() as connection:
+        for model, generator in generators:
+            batch = []
+            for row in generator:
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    connection.execute(insert(model.__table__), batch)
+                    batch = []
+            if batch:
+                connection.execute(insert(model.__table__), batch)
@@ -0,0 +1,5 @@
+from database import init_db
+
+if __name__ == "__main__":
+    init_db()
+    print("Database schema, indexes and default admin are in place")
@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Process-wide cache for the read functions in database.py, invalidated by this process's writes;
+# writes from other processes are seen once entries expire
+MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_table_versions = {}
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'expired': 0}
+
+def cached_read(*tables: str):
+    """Cache the decorated read function until one of `tables` is written or CACHE_TTL_SECONDS pass; results are shared, treat them as read-only."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _lock:
+                versions = tuple(_table_versions.get(table, 0) for table in tables)
+                key = (func.__name__, args, tuple(sorted(kwargs.items())), versions)
+                entry = _entries.get(key)
+                if entry is not None and entry[2] <= time.monotonic():
+                    del _entries[key]
+                    _stats['expired'] += 1
+                elif entry is not None:
+                    _entries.move_to_end(key)
+                    _stats['hits'] += 1
+                    return entry[1]
+                _stats['misses'] += 1
+
+            result = func(*args, **kwargs)
+
+            with _lock:
+                _entries[key] = (tables, result, time.monotonic() + CACHE_TTL_SECONDS)
+                while len(_entries) > MAX_ENTRIES:
+                    _entries.popitem(last=False)
+            return result
+        return wrapper
+    return decorator
+
+def bump_version(*tables: str):
+    """Mark `tables` as changed and drop every cached result that read them"""
+    with _lock:
+        for table in tables:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+        stale = [key for key, (read_tables, _, _) in _entries.items() if set(read_tables) & set(tables)]
+        for key in stale:
+            del _entries[key]
+        _stats['invalidations'] += 1
+
+def clear_cache():
+    with _lock:
+        _entries.clear()
+
+def get_cache_stats() -> dict:
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'hit_rate': _stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(_entries),
+            'table_versions': dict(_table_versions),
+        }
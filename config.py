@@ -18,6 +18,10 @@ def create_db_url(url: str) -> str:
         # Split into protocol and rest
         protocol, rest = url.split('://', 1)
         
+        # URLs without credentials (e.g. a local SQLite file) need no encoding
+        if '@' not in rest:
+            return url
+        
         # Split credentials and host
         credentials, host_part = rest.split('@', 1)
         
@@ -32,9 +36,4 @@ def create_db_url(url: str) -> str:
     except Exception as e:
         raise ValueError(f"Error parsing database URL: {str(e)}")
 
-try:
-    SUPABASE_DB_URL = create_db_url(raw_db_url)
-    print("Database URL parsed successfully")  # Debug line
-except ValueError as e:
-    print(f"Error: {e}")
-    raise
\ No newline at end of file
+SUPABASE_DB_URL = create_db_url(raw_db_url)
\ No newline at end of file
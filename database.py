@@ -1,30 +1,137 @@
+import io
 import os
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 import bcrypt
-import streamlit as st
-from sqlmodel import Field, Session, SQLModel, create_engine, select
-from datetime import datetime
-from models import Donation, Expense, Salary, AdminUser
+import pandas as pd
+from sqlalchemy import BigInteger, Date, Integer, and_, case, cast, delete, false, func, inspect, literal, or_, text, type_coerce, union_all, select as sa_select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, SQLModel, select
+from datetime import date, datetime, timedelta
+from models import Donation, Expense, Salary, AdminUser, MonthlyRollup, DonorRollup, DeletedRow, Money, to_poisha
 from config import SUPABASE_DB_URL
-from db_config import POOL_CONFIG
+from db_config import POOL_SIZE, shared_engine
+from cache import cached_read, bump_version
+from diagnostics import pool_status
+import replica
+import search
 
-# Create engine with Supabase connection
-engine = create_engine(
-    SUPABASE_DB_URL,
-    echo=False,
-    **POOL_CONFIG
-)
+# One engine and pool per process, shared by every Streamlit session
+engine = shared_engine(SUPABASE_DB_URL)
+
+# Worker threads for fetch_concurrently, one per pooled connection so parallel reads never wait on overflow
+_fetch_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='db-fetch')
+
+# Set AUTO_INIT_DB=0 where bootstrap_db.py is run at deploy time, so app processes skip the schema checks
+AUTO_INIT_DB = os.getenv("AUTO_INIT_DB", "1") == "1"
+
+_init_lock = threading.Lock()
+_initialized = False
+
+def get_secret(name: str, default: str) -> str:
+    """Read a Streamlit secret, falling back to the environment outside a Streamlit deployment"""
+    # Imported here so scripts that never read secrets don't pay for loading Streamlit
+    import streamlit as st
+    try:
+        return st.secrets.get(name, os.getenv(name, default))
+    except FileNotFoundError:
+        return os.getenv(name, default)
+
+def add_missing_columns():
+    """Add model columns missing from existing tables, filling existing rows from the server default before any NOT NULL."""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                if column.server_default is None:
+                    continue
+                default = str(column.server_default.arg.compile(engine))
+                connection.execute(text(f'UPDATE {table.name} SET {column.name} = {default}'))
+                # SQLite can't alter a column in place; the model's own default fills it on insert there
+                if engine.dialect.name == 'postgresql':
+                    connection.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {column.name} SET DEFAULT {default}'))
+                    if not column.nullable:
+                        connection.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {column.name} SET NOT NULL'))
+
+def convert_money_columns():
+    """Convert amount columns still holding float taka, from before amounts were stored as poisha, to whole poisha"""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not isinstance(column.type, Money) or isinstance(existing[column.name], Integer):
+                    continue
+                name = column.name
+                if engine.dialect.name == 'postgresql':
+                    # Through NUMERIC, so 0.285 becomes 29 poisha rather than its binary 28.4999...
+                    connection.execute(text(
+                        f'ALTER TABLE {table.name} ALTER COLUMN {name} TYPE BIGINT USING round(CAST({name} AS NUMERIC) * 100)'
+                    ))
+                    continue
+                # SQLite can't change a column's type: fill a new one, then swap it in; create_indexes rebuilds the indexes
+                for index in inspector.get_indexes(table.name):
+                    if name in index['column_names']:
+                        connection.execute(text(f'DROP INDEX {index["name"]}'))
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name}_poisha BIGINT NOT NULL DEFAULT 0'))
+                connection.execute(text(f'UPDATE {table.name} SET {name}_poisha = CAST(round(round({name}, 2) * 100) AS INTEGER)'))
+                connection.execute(text(f'ALTER TABLE {table.name} DROP COLUMN {name}'))
+                connection.execute(text(f'ALTER TABLE {table.name} RENAME COLUMN {name}_poisha TO {name}'))
+
+def create_indexes():
+    """Create any declared index that is missing on an existing table"""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+def ensure_initialized():
+    """Run init_db once per process, on first use rather than at import"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            if AUTO_INIT_DB:
+                init_db()
+            replica.start(engine)
+            _initialized = True
+
+def _reader():
+    """Engine for the read paths: the local replica once it has synced, otherwise the primary database"""
+    return replica.engine if replica.is_ready() else engine
+
+def _written(*tables: str):
+    """Propagate a committed write to the replica, then drop cached reads of `tables`"""
+    replica.try_sync()
+    bump_version(*tables)
 
 def init_db():
     """Initialize the database, creating all tables"""
+    # The trigram indexes behind search need pg_trgm before create_all builds them
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
     SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist, indexes and new columns included
+    add_missing_columns()
+    convert_money_columns()
+    create_indexes()
+    search.create_sqlite_index(engine)
     
     # Add default admin user if none exists
     with Session(engine) as session:
         admin_exists = session.exec(select(AdminUser)).first()
         if not admin_exists:
-            default_username = st.secrets.get("ADMIN_USERNAME", "admin")
-            default_password = st.secrets.get("ADMIN_PASSWORD", "admin123")
+            default_username = get_secret("ADMIN_USERNAME", "admin")
+            default_password = get_secret("ADMIN_PASSWORD", "admin123")
             
             # Hash the password
             password_bytes = default_password.encode('utf-8')
@@ -35,6 +142,16 @@ def init_db():
             admin = AdminUser(username=default_username, password_hash=hashed_password)
             session.add(admin)
             session.commit()
+        
+        # Populate the rollups once for ledgers recorded before they existed
+        if not session.exec(select(MonthlyRollup.month).limit(1)).first() and (
+            session.exec(select(Donation.id).limit(1)).first()
+            or session.exec(select(Expense.id).limit(1)).first()
+            or session.exec(select(Salary.id).limit(1)).first()
+        ):
+            rebuild_monthly_rollups()
+        if not session.exec(select(DonorRollup.donor_name).limit(1)).first() and session.exec(select(Donation.id).limit(1)).first():
+            rebuild_donor_rollups()
 
 def hash_password(password: str) -> bytes:
     password_bytes = password.encode('utf-8')
@@ -44,6 +161,250 @@ def hash_password(password: str) -> bytes:
 def check_password(password: str, hashed_password: bytes) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
 
+# Column each ledger's rollups are broken down by; rollup kinds are the table names
+ROLLUP_LABELS = {Donation: None, Expense: 'category', Salary: 'teacher_name'}
+
+# SQLite date() modifiers equivalent to Postgres date_trunc for each granularity; weeks start on Monday in both
+SQLITE_PERIOD_MODIFIERS = {
+    'day': (),
+    'week': ('weekday 0', '-6 days'),
+    'month': ('start of month',),
+    'year': ('start of year',),
+}
+
+def _period_start(column, granularity: str = 'month', dialect: Optional[str] = None):
+    """SQL expression for the first day of the day/week/month/year `column` falls in"""
+    if (dialect or engine.dialect.name) == 'sqlite':
+        return type_coerce(func.date(column, *SQLITE_PERIOD_MODIFIERS[granularity]), Date)
+    return cast(func.date_trunc(granularity, column), Date)
+
+def _update_rollup(session: Session, kind: str, label: str, day, amount: float, count: int):
+    """Add `amount` and `count` to the rollup row for `day`'s month inside the caller's transaction"""
+    insert = pg_insert if engine.dialect.name == 'postgresql' else sqlite_insert
+    statement = insert(MonthlyRollup).values(
+        month=datetime(day.year, day.month, 1).date(),
+        kind=kind,
+        label=label,
+        total=amount,
+        count=count,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['month', 'kind', 'label'],
+        set_={
+            'total': MonthlyRollup.total + statement.excluded.total,
+            'count': MonthlyRollup.count + statement.excluded.count,
+        },
+    )
+    session.execute(statement)
+
+def rebuild_monthly_rollups():
+    """Recompute every rollup row from the ledgers in one transaction"""
+    with Session(engine) as session:
+        session.execute(delete(MonthlyRollup))
+        for model, label_field in ROLLUP_LABELS.items():
+            month = _period_start(model.date)
+            group_by = [month] if label_field is None else [month, getattr(model, label_field)]
+            totals = session.exec(
+                select(*group_by, func.sum(model.amount), func.count()).group_by(*group_by)
+            ).all()
+            for row in totals:
+                label = row[1] if label_field is not None else ''
+                session.add(MonthlyRollup(
+                    month=row[0], kind=model.__tablename__, label=label, total=row[-2], count=row[-1]
+                ))
+        session.commit()
+    replica.try_sync(rollups=True)
+    bump_version('donation', 'expense', 'salary')
+
+def _update_donor(session: Session, donor_name: str, is_anonymous: bool, first_gift, last_gift, amount: float, gifts: int):
+    """Add `gifts` gifts totalling `amount`, made between `first_gift` and `last_gift`, to a donor's rollup row"""
+    if engine.dialect.name == 'postgresql':
+        insert, earliest, latest = pg_insert, func.least, func.greatest
+    else:
+        insert, earliest, latest = sqlite_insert, func.min, func.max
+    statement = insert(DonorRollup).values(
+        donor_name=donor_name,
+        is_anonymous=bool(is_anonymous),
+        total=amount,
+        gifts=gifts,
+        first_gift=first_gift,
+        last_gift=last_gift,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['donor_name', 'is_anonymous'],
+        set_={
+            'total': DonorRollup.total + statement.excluded.total,
+            'gifts': DonorRollup.gifts + statement.excluded.gifts,
+            'first_gift': earliest(DonorRollup.first_gift, statement.excluded.first_gift),
+            'last_gift': latest(DonorRollup.last_gift, statement.excluded.last_gift),
+        },
+    )
+    session.execute(statement)
+
+def _remove_gift(session: Session, donor_name: str, is_anonymous: bool, day, amount: float):
+    """Take a changed or deleted gift out of its donor's rollup row; call after changing the donation in `session`"""
+    rollup = session.get(DonorRollup, (donor_name, bool(is_anonymous)), with_for_update=True)
+    if rollup is None:
+        return
+    rollup.total -= amount
+    rollup.gifts -= 1
+    if rollup.gifts <= 0:
+        session.delete(rollup)
+        return
+    # Only a donor's first or last gift moves their dates; look those up again from the donations left
+    if day in (rollup.first_gift, rollup.last_gift):
+        rollup.first_gift, rollup.last_gift = session.exec(
+            select(func.min(Donation.date), func.max(Donation.date))
+            .where(Donation.donor_name == donor_name, Donation.is_anonymous == bool(is_anonymous))
+        ).one()
+    session.add(rollup)
+    # Written now, before any upsert of the same row that follows in this transaction
+    session.flush()
+
+def rebuild_donor_rollups():
+    """Recompute every donor's rollup rows from the donations in one grouped query"""
+    totals = (
+        sa_select(
+            Donation.donor_name, Donation.is_anonymous, func.sum(Donation.amount), func.count(),
+            func.min(Donation.date), func.max(Donation.date),
+        )
+        .group_by(Donation.donor_name, Donation.is_anonymous)
+    )
+    with Session(engine) as session:
+        session.execute(delete(DonorRollup))
+        session.execute(DonorRollup.__table__.insert().from_select(
+            ['donor_name', 'is_anonymous', 'total', 'gifts', 'first_gift', 'last_gift'], totals
+        ))
+        session.commit()
+    replica.try_sync(rollups=True)
+    bump_version('donation')
+
+@cached_read('donation', 'expense', 'salary')
+def get_monthly_rollups(kind: Optional[str] = None) -> pd.DataFrame:
+    query = sa_select(*MonthlyRollup.__table__.columns).where(MonthlyRollup.count != 0)
+    if kind is not None:
+        query = query.where(MonthlyRollup.kind == kind)
+    frame = _read_frame(query.order_by(MonthlyRollup.month, MonthlyRollup.kind, MonthlyRollup.label))
+    frame['month'] = pd.to_datetime(frame['month'])
+    return frame
+
+# Pandas period of each time-series granularity, finest first; W-SUN weeks run Monday to Sunday like date_trunc('week')
+TIME_SERIES_PERIODS = {'day': 'D', 'week': 'W-SUN', 'month': 'M', 'year': 'Y'}
+TIME_SERIES_MAX_POINTS = 120
+
+@cached_read('donation', 'expense', 'salary')
+def get_time_series(granularity: str = 'month', start: Optional[date] = None, end: Optional[date] = None,
+                    max_points: int = TIME_SERIES_MAX_POINTS) -> dict:
+    """Donation, expense and salary totals per period, coarsened to at most `max_points` periods; returns {'granularity', 'frame'}."""
+    kinds = [model.__tablename__ for model in ROLLUP_LABELS]
+    reader = _reader()
+    with Session(reader) as session:
+        if start is None or end is None:
+            first, last = session.exec(
+                select(func.min(MonthlyRollup.month), func.max(MonthlyRollup.month)).where(MonthlyRollup.count != 0)
+            ).one()
+            if first is None:
+                return {'granularity': granularity, 'frame': pd.DataFrame(columns=['period', *kinds])}
+            start = start or first
+            end = end or (pd.Timestamp(last) + pd.offsets.MonthEnd(0)).date()
+
+        granularities = list(TIME_SERIES_PERIODS)
+        for granularity in granularities[granularities.index(granularity):]:
+            periods = pd.period_range(start, end, freq=TIME_SERIES_PERIODS[granularity])
+            if len(periods) <= max_points:
+                break
+        low, high = periods[0].start_time.date(), (periods[-1] + 1).start_time.date()
+
+        if granularity in ('month', 'year'):
+            # Whole months are already summed in the rollups, so these never touch the ledgers
+            period = _period_start(MonthlyRollup.month, granularity, reader.dialect.name)
+            rows = session.exec(
+                select(period, MonthlyRollup.kind, func.sum(MonthlyRollup.total))
+                .where(MonthlyRollup.month >= low, MonthlyRollup.month < high)
+                .group_by(period, MonthlyRollup.kind)
+            ).all()
+        else:
+            rows = []
+            for model in ROLLUP_LABELS:
+                period = _period_start(model.date, granularity, reader.dialect.name)
+                totals = session.exec(
+                    select(period, func.sum(model.amount))
+                    .where(model.date >= low, model.date < high)
+                    .group_by(period)
+                ).all()
+                rows += [(row[0], model.__tablename__, row[1]) for row in totals]
+
+    totals = pd.DataFrame(rows, columns=['period', 'kind', 'total'])
+    totals['period'] = pd.to_datetime(totals['period'])
+    frame = (
+        totals.pivot_table(index='period', columns='kind', values='total', aggfunc='sum')
+        .reindex(index=periods.start_time, columns=kinds, fill_value=0)
+        .fillna(0)
+        .rename_axis(index='period', columns=None)
+        .reset_index()
+    )
+    return {'granularity': granularity, 'frame': frame}
+
+# Column naming who each cash-flow entry was paid by or to
+CASH_FLOW_PARTIES = {Donation: 'donor_name', Expense: 'description', Salary: 'teacher_name'}
+
+@cached_read('donation', 'expense', 'salary')
+def get_balance_checkpoints() -> pd.DataFrame:
+    """Net flow and closing balance of every month, a running total over the monthly rollups."""
+    signed = case((MonthlyRollup.kind == Donation.__tablename__, MonthlyRollup.total), else_=-MonthlyRollup.total)
+    monthly = (
+        sa_select(MonthlyRollup.month, func.sum(signed).label('net'))
+        .where(MonthlyRollup.count != 0)
+        .group_by(MonthlyRollup.month)
+        .subquery()
+    )
+    frame = _read_frame(
+        sa_select(monthly.c.month, monthly.c.net, func.sum(monthly.c.net).over(order_by=monthly.c.month).label('balance'))
+        .order_by(monthly.c.month)
+    )
+    frame['month'] = pd.to_datetime(frame['month'])
+    return frame
+
+def _net_flow(start: date, end: date) -> float:
+    """Donations minus expenses and salaries dated from `start` to `end` inclusive"""
+    totals = [
+        sa_select(func.coalesce(func.sum(model.amount), 0)).where(model.date >= start, model.date <= end).scalar_subquery()
+        for model in CASH_FLOW_PARTIES
+    ]
+    with _reader().connect() as connection:
+        return connection.execute(sa_select(type_coerce(totals[0] - totals[1] - totals[2], Money))).scalar()
+
+@cached_read('donation', 'expense', 'salary')
+def get_balance_as_of(day: date) -> float:
+    """Balance at the end of `day`: the previous month's closing checkpoint plus this month's entries up to `day`"""
+    month = day.replace(day=1)
+    checkpoints = get_balance_checkpoints()
+    earlier = checkpoints['balance'][checkpoints['month'] < pd.Timestamp(month)]
+    opening = float(earlier.iloc[-1]) if len(earlier) else 0.0
+    return opening + _net_flow(month, day)
+
+@cached_read('donation', 'expense', 'salary')
+def get_cash_flow(start: date, end: date) -> pd.DataFrame:
+    """Every donation, expense and salary dated `start` to `end` as one signed ledger with a running balance."""
+    flows = union_all(*[
+        sa_select(
+            model.date,
+            model.id,
+            literal(model.__tablename__).label('kind'),
+            getattr(model, party).label('party'),
+            (model.is_anonymous if model is Donation else false()).label('is_anonymous'),
+            (model.amount if model is Donation else -model.amount).label('amount'),
+        ).where(model.date >= start, model.date <= end)
+        for model, party in CASH_FLOW_PARTIES.items()
+    ]).subquery()
+    # Same-day entries are ordered donations, then expenses, then salaries, then by id
+    order = (flows.c.date, flows.c.kind, flows.c.id)
+    frame = _read_frame(
+        sa_select(*flows.c, func.sum(flows.c.amount).over(order_by=order).label('balance')).order_by(*order)
+    )
+    frame['balance'] += get_balance_as_of(start - timedelta(days=1))
+    return frame
+
 def add_donation(donor_name: str, amount: float, date: datetime, notes: str, is_anonymous: bool = False):
     with Session(engine) as session:
         donation = Donation(
@@ -54,7 +415,10 @@ def add_donation(donor_name: str, amount: float, date: datetime, notes: str, is_
             is_anonymous=is_anonymous
         )
         session.add(donation)
+        _update_rollup(session, 'donation', '', date, amount, 1)
+        _update_donor(session, donor_name, is_anonymous, date, date, amount, 1)
         session.commit()
+        _written('donation')
 
 def add_expense(description: str, amount: float, date: datetime, category: str):
     with Session(engine) as session:
@@ -65,7 +429,9 @@ def add_expense(description: str, amount: float, date: datetime, category: str):
             category=category
         )
         session.add(expense)
+        _update_rollup(session, 'expense', category, date, amount, 1)
         session.commit()
+        _written('expense')
 
 def add_salary(teacher_name: str, amount: float, date: datetime):
     with Session(engine) as session:
@@ -75,23 +441,460 @@ def add_salary(teacher_name: str, amount: float, date: datetime):
             date=date
         )
         session.add(salary)
+        _update_rollup(session, 'salary', teacher_name, date, amount, 1)
         session.commit()
+        _written('salary')
+
+# Rows per multi-row INSERT when COPY is not available
+BULK_BATCH_SIZE = 1000
+
+def _copy_value(value) -> str:
+    """Render one value in Postgres COPY text format"""
+    if value is None:
+        return '\\N'
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def _copy_rows(session: Session, model, rows: List[dict]):
+    columns = list(rows[0].keys())
+    # COPY bypasses the column types, so amounts are written as the poisha Money would store
+    money = {column.name for column in model.__table__.columns if isinstance(column.type, Money)}
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(to_poisha(row[column]) if column in money else row[column]) for column in columns) + '\n')
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+def _add_delta(deltas: dict, model, row: dict, sign: int = 1):
+    """Fold one row's amount, in whole poisha, into per-(month, label) rollup deltas with `sign` 1 or -1."""
+    label_field = ROLLUP_LABELS[model]
+    key = (datetime(row['date'].year, row['date'].month, 1).date(), row[label_field] if label_field else '')
+    total, count = deltas.get(key, (0, 0))
+    deltas[key] = (total + sign * to_poisha(row['amount']), count + sign)
+
+def bulk_insert(model, rows: List[dict]) -> int:
+    """Insert already-validated rows and their rollup deltas in one transaction, using COPY on Postgres."""
+    if not rows:
+        return 0
+    deltas = {}
+    for row in rows:
+        _add_delta(deltas, model, row)
+
+    donors = {}
+    if model is Donation:
+        for row in rows:
+            key = (row['donor_name'], bool(row.get('is_anonymous', False)))
+            first, last, total, count = donors.get(key, (row['date'], row['date'], 0, 0))
+            donors[key] = (min(first, row['date']), max(last, row['date']), total + to_poisha(row['amount']), count + 1)
 
-def get_all_donations() -> List[dict]:
     with Session(engine) as session:
-        donations = session.exec(select(Donation).order_by(Donation.date.desc())).all()
+        if engine.dialect.name == 'postgresql':
+            _copy_rows(session, model, rows)
+        else:
+            for start in range(0, len(rows), BULK_BATCH_SIZE):
+                session.execute(model.__table__.insert(), rows[start:start + BULK_BATCH_SIZE])
+        for (month, label), (total, count) in deltas.items():
+            _update_rollup(session, model.__tablename__, label, month, total / 100, count)
+        for (donor_name, is_anonymous), (first, last, total, count) in donors.items():
+            _update_donor(session, donor_name, is_anonymous, first, last, total / 100, count)
+        session.commit()
+    _written(model.__tablename__)
+    return len(rows)
+
+@cached_read('donation')
+def get_all_donations(limit: Optional[int] = None) -> List[dict]:
+    with Session(_reader()) as session:
+        donations = session.exec(select(Donation).order_by(Donation.date.desc()).limit(limit)).all()
         return [donation.dict() for donation in donations]
 
-def get_all_expenses() -> List[dict]:
-    with Session(engine) as session:
-        expenses = session.exec(select(Expense).order_by(Expense.date.desc())).all()
+@cached_read('expense')
+def get_all_expenses(limit: Optional[int] = None) -> List[dict]:
+    with Session(_reader()) as session:
+        expenses = session.exec(select(Expense).order_by(Expense.date.desc()).limit(limit)).all()
         return [expense.dict() for expense in expenses]
 
-def get_teacher_salaries() -> List[dict]:
-    with Session(engine) as session:
-        salaries = session.exec(select(Salary).order_by(Salary.date.desc())).all()
+@cached_read('salary')
+def get_teacher_salaries(limit: Optional[int] = None) -> List[dict]:
+    with Session(_reader()) as session:
+        salaries = session.exec(select(Salary).order_by(Salary.date.desc()).limit(limit)).all()
         return [salary.dict() for salary in salaries]
 
+# Column dtypes for the DataFrame fetch path; repeated names become categoricals
+FRAME_DTYPES = {
+    'id': 'int64',
+    'amount': 'float64',
+    'donor_name': 'category',
+    'teacher_name': 'category',
+    'category': 'category',
+    'is_anonymous': 'bool',
+    'lapsed': 'bool',
+}
+
+def raw_money(query):
+    """`query` with its Money columns read as stored whole poisha, and the names of those columns."""
+    columns, money = [], []
+    for column in query.selected_columns:
+        if isinstance(column.type, Money):
+            money.append(column.name)
+            column = type_coerce(column, BigInteger).label(column.name)
+        columns.append(column)
+    return query.with_only_columns(*columns, maintain_column_froms=True), money
+
+def poisha_to_taka(frame: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Convert `frame`'s whole-poisha `columns` to taka in place, a column at a time"""
+    for column in columns:
+        # Postgres returns a BIGINT SUM as NUMERIC, which arrives as Decimal objects
+        frame[column] = pd.to_numeric(frame[column]) / 100
+    return frame
+
+def _read_frame(query, reader=None) -> pd.DataFrame:
+    """Run a Core query and load the raw result rows straight into typed columns, skipping model instances"""
+    query, money = raw_money(query)
+    with (reader or _reader()).connect() as connection:
+        result = connection.execute(query)
+        frame = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+    frame = poisha_to_taka(frame, money).astype({column: dtype for column, dtype in FRAME_DTYPES.items() if column in frame.columns})
+    if 'date' in frame.columns:
+        frame['date'] = pd.to_datetime(frame['date'])
+    return frame
+
+def _frame_columns(model) -> list:
+    """`model`'s columns minus the replica's change marker, which the pages never show"""
+    return [column for column in model.__table__.columns if column.name != 'updated_at']
+
+# Column each ledger can be narrowed to a single value of: one donor, expense category or teacher
+LEDGER_FILTERS = {Donation: 'donor_name', Expense: 'category', Salary: 'teacher_name'}
+
+def _ledger_filters(model, start: Optional[date] = None, end: Optional[date] = None, value: Optional[str] = None,
+                    include_anonymous: bool = True) -> list:
+    """WHERE clauses for `model`'s rows dated `start` to `end` (inclusive, open if None) whose LEDGER_FILTERS column is `value`."""
+    filters = []
+    if start is not None:
+        filters.append(model.date >= start)
+    if end is not None:
+        filters.append(model.date <= end)
+    if value is not None:
+        filters.append(getattr(model, LEDGER_FILTERS[model]) == value)
+        if model is Donation and not include_anonymous:
+            filters.append(Donation.is_anonymous == false())
+    return filters
+
+def _ledger_query(model, limit: Optional[int] = None, filters=()):
+    return sa_select(*_frame_columns(model)).where(*filters).order_by(model.date.desc()).limit(limit)
+
+@cached_read('donation')
+def get_donations_df(limit: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None,
+                     donor: Optional[str] = None) -> pd.DataFrame:
+    return _read_frame(_ledger_query(Donation, limit, _ledger_filters(Donation, start, end, donor)))
+
+@cached_read('expense')
+def get_expenses_df(limit: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None,
+                    category: Optional[str] = None) -> pd.DataFrame:
+    return _read_frame(_ledger_query(Expense, limit, _ledger_filters(Expense, start, end, category)))
+
+@cached_read('salary')
+def get_salaries_df(limit: Optional[int] = None, start: Optional[date] = None, end: Optional[date] = None,
+                    teacher: Optional[str] = None) -> pd.DataFrame:
+    return _read_frame(_ledger_query(Salary, limit, _ledger_filters(Salary, start, end, teacher)))
+
+@cached_read('donation', 'expense', 'salary')
+def get_filter_values(kind: str, include_anonymous: bool = True) -> List[str]:
+    """The sorted donor names, expense categories or teacher names that have entries, read from the rollups."""
+    if kind == Donation.__tablename__:
+        query = sa_select(DonorRollup.donor_name).distinct().order_by(DonorRollup.donor_name)
+        if not include_anonymous:
+            query = query.where(DonorRollup.is_anonymous == false())
+    else:
+        query = (
+            sa_select(MonthlyRollup.label).distinct()
+            .where(MonthlyRollup.kind == kind, MonthlyRollup.count != 0)
+            .order_by(MonthlyRollup.label)
+        )
+    with _reader().connect() as connection:
+        return list(connection.execute(query).scalars())
+
+# Rows per chunk read by iter_ledger_chunks
+EXPORT_CHUNK_SIZE = 10_000
+
+def iter_ledger_chunks(model, start: Optional[date] = None, end: Optional[date] = None,
+                       anonymous_label: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield `model`'s rows dated `start` to `end` as DataFrames of `chunk_size` rows, oldest first, from a server-side cursor."""
+    columns = _frame_columns(model)
+    if model is Donation and anonymous_label is not None:
+        masked = case((Donation.is_anonymous, literal(anonymous_label)), else_=Donation.donor_name).label('donor_name')
+        columns = [masked if column.name == 'donor_name' else column for column in columns]
+    query = sa_select(*columns).where(*_ledger_filters(model, start, end))
+    query, money = raw_money(query.order_by(model.date, model.id))
+
+    with _reader().connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        names = list(result.keys())
+        for rows in result.partitions():
+            yield poisha_to_taka(pd.DataFrame.from_records(rows, columns=names), money)
+
+def _keyset_page(model, page_size: int, after: Optional[Tuple] = None, before: Optional[Tuple] = None, filters=()) -> dict:
+    """One page of `model`'s rows matching `filters` by (date, id) descending, seeking past the `after`/`before` cursor."""
+    query = sa_select(*_frame_columns(model)).where(*filters)
+    if before is not None:
+        date, id = before
+        query = query.where(or_(model.date > date, and_(model.date == date, model.id > id)))
+        query = query.order_by(model.date.asc(), model.id.asc())
+    else:
+        if after is not None:
+            date, id = after
+            query = query.where(or_(model.date < date, and_(model.date == date, model.id < id)))
+        query = query.order_by(model.date.desc(), model.id.desc())
+
+    frame = _read_frame(query.limit(page_size + 1))
+    return _page(frame, page_size, after, before, lambda row: (row['date'].date(), int(row['id'])))
+
+def _page(frame: pd.DataFrame, page_size: int, after, before, cursor) -> dict:
+    """Turn the up to page_size + 1 rows fetched past a cursor into a page and its navigation state."""
+    has_more = len(frame) > page_size
+    frame = frame.iloc[:page_size]
+    if before is not None:
+        frame = frame.iloc[::-1]
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after is not None
+    frame = frame.reset_index(drop=True)
+    return {
+        'frame': frame,
+        'has_next': has_next,
+        'has_prev': has_prev,
+        'first_cursor': cursor(frame.iloc[0]) if len(frame) else None,
+        'last_cursor': cursor(frame.iloc[-1]) if len(frame) else None,
+    }
+
+@cached_read('donation')
+def get_donations_page(page_size: int, after: Optional[Tuple] = None, before: Optional[Tuple] = None,
+                       start: Optional[date] = None, end: Optional[date] = None, donor: Optional[str] = None,
+                       include_anonymous: bool = True) -> dict:
+    """One page of the donations dated `start` to `end`, optionally from one donor; see _ledger_filters"""
+    return _keyset_page(Donation, page_size, after, before, _ledger_filters(Donation, start, end, donor, include_anonymous))
+
+@cached_read('expense')
+def get_expenses_page(page_size: int, after: Optional[Tuple] = None, before: Optional[Tuple] = None,
+                      start: Optional[date] = None, end: Optional[date] = None, category: Optional[str] = None) -> dict:
+    return _keyset_page(Expense, page_size, after, before, _ledger_filters(Expense, start, end, category))
+
+@cached_read('salary')
+def get_salaries_page(page_size: int, after: Optional[Tuple] = None, before: Optional[Tuple] = None,
+                      start: Optional[date] = None, end: Optional[date] = None, teacher: Optional[str] = None) -> dict:
+    return _keyset_page(Salary, page_size, after, before, _ledger_filters(Salary, start, end, teacher))
+
+def _search_page(model, query: str, page_size: int, after: Optional[int], before: Optional[int],
+                 include_private: bool = True, filters=()) -> dict:
+    """One page of `model`'s rows matching `query`, newest id first, with row ids as the cursors."""
+    words = search.query_words(query)
+    if not words:
+        return _keyset_page(model, page_size, after, before, filters)
+    # The match is dialect-specific, so the page is read from the engine it was built for
+    reader = _reader()
+    source, where, row_id = search.matching_rows(reader, model, words, include_private)
+    query = sa_select(*_frame_columns(model)).select_from(source).where(where, *filters)
+    if before is not None:
+        query = query.where(row_id > before).order_by(row_id.asc())
+    else:
+        if after is not None:
+            query = query.where(row_id < after)
+        query = query.order_by(row_id.desc())
+
+    frame = _read_frame(query.limit(page_size + 1), reader)
+    return _page(frame, page_size, after, before, lambda row: int(row['id']))
+
+@cached_read('donation')
+def search_donations(query: str, page_size: int, after: Optional[int] = None, before: Optional[int] = None,
+                     include_anonymous: bool = True, start: Optional[date] = None, end: Optional[date] = None,
+                     donor: Optional[str] = None) -> dict:
+    """Search donor names and notes; without `include_anonymous`, anonymous donations match on their notes only"""
+    filters = _ledger_filters(Donation, start, end, donor, include_anonymous)
+    return _search_page(Donation, query, page_size, after, before, include_anonymous, filters)
+
+@cached_read('expense')
+def search_expenses(query: str, page_size: int, after: Optional[int] = None, before: Optional[int] = None,
+                    start: Optional[date] = None, end: Optional[date] = None, category: Optional[str] = None) -> dict:
+    return _search_page(Expense, query, page_size, after, before, filters=_ledger_filters(Expense, start, end, category))
+
+@cached_read('salary')
+def search_salaries(query: str, page_size: int, after: Optional[int] = None, before: Optional[int] = None,
+                    start: Optional[date] = None, end: Optional[date] = None, teacher: Optional[str] = None) -> dict:
+    return _search_page(Salary, query, page_size, after, before, filters=_ledger_filters(Salary, start, end, teacher))
+
+# Donors whose last gift is older than this are shown as lapsed
+LAPSED_AFTER_DAYS = 365
+
+# Leaderboard orderings: column -> whether it sorts largest (or latest) first; ties go by name
+DONOR_SORTS = {
+    'total': True,
+    'gifts': True,
+    'average': True,
+    'last_gift': True,
+    'first_gift': False,
+    'donor_name': False,
+}
+
+def _donor_totals(include_anonymous: bool):
+    """One row per donor from DonorRollup; without `include_anonymous` their anonymous gifts are left out"""
+    query = (
+        sa_select(
+            DonorRollup.donor_name,
+            func.sum(DonorRollup.total).label('total'),
+            func.sum(DonorRollup.gifts).label('gifts'),
+            # Rounded to whole poisha, so a page's cursor matches its last row exactly
+            type_coerce(func.round(func.sum(DonorRollup.total) / func.sum(DonorRollup.gifts)), Money).label('average'),
+            func.min(DonorRollup.first_gift).label('first_gift'),
+            func.max(DonorRollup.last_gift).label('last_gift'),
+        )
+        .group_by(DonorRollup.donor_name)
+    )
+    if not include_anonymous:
+        query = query.where(DonorRollup.is_anonymous == false())
+    return query.subquery('donors')
+
+@cached_read('donation')
+def get_donor_leaderboard(page_size: int, today: date, sort: str = 'total', after: Optional[Tuple] = None, before: Optional[Tuple] = None,
+                          include_anonymous: bool = True, lapsed_only: bool = False) -> dict:
+    """One page of donors from DonorRollup ordered by `sort`, a DONOR_SORTS key, with (sort value, name) cursors, lapsed as of `today`."""
+    donors = _donor_totals(include_anonymous)
+    key, name = donors.c[sort], donors.c.donor_name
+    lapsed = donors.c.last_gift < today - timedelta(days=LAPSED_AFTER_DAYS)
+    query = sa_select(*donors.c, lapsed.label('lapsed'))
+    if lapsed_only:
+        query = query.where(lapsed)
+
+    descending = DONOR_SORTS[sort]
+    if before is not None:
+        value, donor = before
+        query = query.where(or_(key > value if descending else key < value, and_(key == value, name < donor)))
+        query = query.order_by(key.asc() if descending else key.desc(), name.desc())
+    else:
+        if after is not None:
+            value, donor = after
+            query = query.where(or_(key < value if descending else key > value, and_(key == value, name > donor)))
+        query = query.order_by(key.desc() if descending else key.asc(), name.asc())
+
+    frame = _read_frame(query.limit(page_size + 1))
+    for column in ('first_gift', 'last_gift'):
+        frame[column] = pd.to_datetime(frame[column])
+
+    def cursor(row):
+        value = row[sort]
+        if isinstance(value, pd.Timestamp):
+            value = value.date()
+        elif hasattr(value, 'item'):
+            value = value.item()
+        return value, row['donor_name']
+
+    return _page(frame, page_size, after, before, cursor)
+
+@cached_read('donation')
+def get_donor_overview(today: date, include_anonymous: bool = True) -> dict:
+    """Donor counts as of `today` for the leaderboard's header, plus the anonymous gifts the leaderboard leaves unnamed"""
+    donors = _donor_totals(include_anonymous)
+    lapsed_before = today - timedelta(days=LAPSED_AFTER_DAYS)
+    with _reader().connect() as connection:
+        count, lapsed, repeat = connection.execute(sa_select(
+            func.count(),
+            func.coalesce(func.sum(case((donors.c.last_gift < lapsed_before, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((donors.c.gifts > 1, 1), else_=0)), 0),
+        )).one()
+        anonymous_total, anonymous_gifts = connection.execute(
+            sa_select(func.coalesce(func.sum(DonorRollup.total), 0), func.coalesce(func.sum(DonorRollup.gifts), 0))
+            .where(DonorRollup.is_anonymous)
+        ).one()
+    return {
+        'donors': count,
+        'lapsed': int(lapsed),
+        'repeat_donors': int(repeat),
+        'anonymous_total': anonymous_total,
+        'anonymous_gifts': int(anonymous_gifts),
+    }
+
+def _label_totals(session: Session, start: Optional[date], end: Optional[date]) -> dict:
+    """{(kind, label): (poisha, count)} of entries dated `start` to `end`, from the rollups plus the partial months at either end."""
+    first = start if start is None or start.day == 1 else (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    after = None if end is None else end + timedelta(days=1)
+    last = after if after is None else after.replace(day=1)
+    if first is not None and last is not None and last < first:
+        first = last = after
+
+    rollups = select(MonthlyRollup.kind, MonthlyRollup.label, type_coerce(MonthlyRollup.total, BigInteger), MonthlyRollup.count)
+    if first is not None:
+        rollups = rollups.where(MonthlyRollup.month >= first)
+    if last is not None:
+        rollups = rollups.where(MonthlyRollup.month < last)
+    rows = list(session.exec(rollups).all())
+
+    edges = [(start, first), (last, after)]
+    for model, label_field in ROLLUP_LABELS.items():
+        label = literal('') if label_field is None else getattr(model, label_field)
+        for low, high in edges:
+            if low is None or high is None or low >= high:
+                continue
+            rows += [
+                (model.__tablename__, *row) for row in session.exec(
+                    select(label, type_coerce(func.sum(model.amount), BigInteger), func.count())
+                    .where(model.date >= low, model.date < high)
+                    .group_by(label)
+                ).all()
+            ]
+
+    totals = {}
+    for kind, label, poisha, count in rows:
+        total, entries = totals.get((kind, label), (0, 0))
+        totals[(kind, label)] = (total + int(poisha), entries + count)
+    return {key: value for key, value in totals.items() if value[1] != 0}
+
+@cached_read('donation', 'expense', 'salary')
+def get_dashboard_summary(start: Optional[date] = None, end: Optional[date] = None) -> dict:
+    """Totals, breakdowns and distinct counts for the dashboard over `start` to `end` (inclusive, open if None)"""
+    with Session(_reader()) as session:
+        totals = _label_totals(session, start, end)
+        if start is None and end is None:
+            num_donors = session.exec(select(func.count(func.distinct(DonorRollup.donor_name)))).one()
+        else:
+            num_donors = session.exec(
+                select(func.count(func.distinct(Donation.donor_name))).where(*_ledger_filters(Donation, start, end))
+            ).one()
+
+    # Totals and distinct counts follow from the (small) per-label breakdowns,
+    # added up in whole poisha so they are exact
+    salaries_by_teacher = sorted((label, poisha) for (kind, label), (poisha, _) in totals.items() if kind == 'salary')
+    expenses_by_category = sorted((label, poisha) for (kind, label), (poisha, _) in totals.items() if kind == 'expense')
+    return {
+        'total_donations': sum(poisha for (kind, _), (poisha, _) in totals.items() if kind == 'donation') / 100,
+        'total_expenses': sum(poisha for _, poisha in expenses_by_category) / 100,
+        'total_salaries': sum(poisha for _, poisha in salaries_by_teacher) / 100,
+        'num_donors': num_donors,
+        'num_teachers': len(salaries_by_teacher),
+        'expense_categories': len(expenses_by_category),
+        'salaries_by_teacher': [(teacher, poisha / 100) for teacher, poisha in salaries_by_teacher],
+        'expenses_by_category': [(category, poisha / 100) for category, poisha in expenses_by_category],
+    }
+
+def get_pool_status() -> dict:
+    return pool_status(engine)
+
+def fetch_concurrently(calls: dict) -> Tuple[dict, dict]:
+    """Run the zero-argument callables in `calls` in parallel; returns their results and timings (plus 'total') by name."""
+    def timed(func):
+        started = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - started
+
+    started = time.perf_counter()
+    futures = {name: _fetch_executor.submit(timed, func) for name, func in calls.items()}
+    results, timings = {}, {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+    timings['total'] = time.perf_counter() - started
+    return results, timings
+
 def verify_admin(username: str, password: str) -> bool:
     with Session(engine) as session:
         admin = session.exec(
@@ -103,70 +906,166 @@ def verify_admin(username: str, password: str) -> bool:
     return False
 
 def change_admin_password(username: str, old_password: str, new_password: str) -> bool:
-    if verify_admin(username, old_password):
-        with Session(engine) as session:
-            admin = session.exec(
-                select(AdminUser).where(AdminUser.username == username)
-            ).first()
-            admin.password_hash = hash_password(new_password)
-            session.add(admin)
-            session.commit()
-        return True
-    return False
+    # Verify and update in one session and transaction; the row is locked so concurrent changes can't interleave
+    with Session(engine) as session:
+        admin = session.exec(
+            select(AdminUser).where(AdminUser.username == username).with_for_update()
+        ).first()
+        if not admin or not check_password(old_password, admin.password_hash):
+            return False
+        admin.password_hash = hash_password(new_password)
+        session.add(admin)
+        session.commit()
+    return True
 
 def update_donation(id: int, donor_name: str, amount: float, date: datetime, notes: str, is_anonymous: bool):
     with Session(engine) as session:
-        donation = session.get(Donation, id)
-        if donation:
-            donation.donor_name = donor_name
-            donation.amount = amount
-            donation.date = date
-            donation.notes = notes
-            donation.is_anonymous = is_anonymous
-            session.add(donation)
-            session.commit()
+        # Locked until commit, so concurrent edits of a row apply their rollup deltas one after another
+        donation = session.get(Donation, id, with_for_update=True)
+        if donation is None:
+            return
+        old_gift = (donation.donor_name, donation.is_anonymous, donation.date, donation.amount)
+        _update_rollup(session, 'donation', '', donation.date, -donation.amount, -1)
+        _update_rollup(session, 'donation', '', date, amount, 1)
+        donation.donor_name = donor_name
+        donation.amount = amount
+        donation.date = date
+        donation.notes = notes
+        donation.is_anonymous = is_anonymous
+        session.add(donation)
+        _remove_gift(session, *old_gift)
+        _update_donor(session, donor_name, is_anonymous, date, date, amount, 1)
+        session.commit()
+        _written('donation')
 
 def update_expense(id: int, description: str, amount: float, date: datetime, category: str):
     with Session(engine) as session:
-        expense = session.get(Expense, id)
-        if expense:
-            expense.description = description
-            expense.amount = amount
-            expense.date = date
-            expense.category = category
-            session.add(expense)
-            session.commit()
+        expense = session.get(Expense, id, with_for_update=True)
+        if expense is None:
+            return
+        _update_rollup(session, 'expense', expense.category, expense.date, -expense.amount, -1)
+        _update_rollup(session, 'expense', category, date, amount, 1)
+        expense.description = description
+        expense.amount = amount
+        expense.date = date
+        expense.category = category
+        session.add(expense)
+        session.commit()
+        _written('expense')
 
 def update_salary(id: int, teacher_name: str, amount: float, date: datetime):
     with Session(engine) as session:
-        salary = session.get(Salary, id)
-        if salary:
-            salary.teacher_name = teacher_name
-            salary.amount = amount
-            salary.date = date
-            session.add(salary)
-            session.commit()
+        salary = session.get(Salary, id, with_for_update=True)
+        if salary is None:
+            return
+        _update_rollup(session, 'salary', salary.teacher_name, salary.date, -salary.amount, -1)
+        _update_rollup(session, 'salary', teacher_name, date, amount, 1)
+        salary.teacher_name = teacher_name
+        salary.amount = amount
+        salary.date = date
+        session.add(salary)
+        session.commit()
+        _written('salary')
+
+def _refresh_donors(session: Session, donor_names: set):
+    """Re-aggregate the rollup rows of `donor_names`, named and anonymous, from their donations"""
+    names = list(donor_names)
+    for start in range(0, len(names), BULK_BATCH_SIZE):
+        batch = names[start:start + BULK_BATCH_SIZE]
+        session.execute(delete(DonorRollup).where(DonorRollup.donor_name.in_(batch)))
+        session.execute(DonorRollup.__table__.insert().from_select(
+            ['donor_name', 'is_anonymous', 'total', 'gifts', 'first_gift', 'last_gift'],
+            sa_select(
+                Donation.donor_name, Donation.is_anonymous, func.sum(Donation.amount), func.count(),
+                func.min(Donation.date), func.max(Donation.date),
+            )
+            .where(Donation.donor_name.in_(batch))
+            .group_by(Donation.donor_name, Donation.is_anonymous)
+        ))
+
+def apply_changes(model, inserted: List[dict] = (), updated: Optional[dict] = None, deleted: List[int] = ()) -> dict:
+    """Insert, update and delete rows of `model` in one transaction, adjusting the rollups; returns the counts."""
+    updated = updated or {}
+    deltas, donors = {}, set()
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+
+    def count_row(row, sign: int = 1):
+        _add_delta(deltas, model, row.model_dump(), sign)
+        if model is Donation:
+            donors.add(row.donor_name)
+
+    ids = list(updated) + list(deleted)
+    with Session(engine) as session:
+        existing = {}
+        if ids:
+            rows = session.exec(select(model).where(model.id.in_(ids)).with_for_update()).all()
+            existing = {row.id: row for row in rows}
+        for id in deleted:
+            row = existing.get(id)
+            if row is None:
+                continue
+            count_row(row, -1)
+            session.delete(row)
+            session.add(DeletedRow(table_name=model.__tablename__, row_id=id))
+            counts['deleted'] += 1
+        for id, values in updated.items():
+            row = existing.get(id)
+            if row is None or id in deleted:
+                continue
+            count_row(row, -1)
+            for field, value in values.items():
+                setattr(row, field, value)
+            session.add(row)
+            count_row(row)
+            counts['updated'] += 1
+        for values in inserted:
+            row = model(**values)
+            session.add(row)
+            count_row(row)
+            counts['inserted'] += 1
+        if not any(counts.values()):
+            return counts
+
+        session.flush()
+        for (month, label), (total, count) in deltas.items():
+            if count or total:
+                _update_rollup(session, model.__tablename__, label, month, total / 100, count)
+        if model is Donation:
+            _refresh_donors(session, donors)
+        session.commit()
+    _written(model.__tablename__)
+    return counts
 
 def delete_donation(id: int):
     with Session(engine) as session:
-        donation = session.get(Donation, id)
-        if donation:
-            session.delete(donation)
-            session.commit()
+        donation = session.get(Donation, id, with_for_update=True)
+        if donation is None:
+            return
+        _update_rollup(session, 'donation', '', donation.date, -donation.amount, -1)
+        session.delete(donation)
+        _remove_gift(session, donation.donor_name, donation.is_anonymous, donation.date, donation.amount)
+        session.add(DeletedRow(table_name='donation', row_id=id))
+        session.commit()
+        _written('donation')
 
 def delete_expense(id: int):
     with Session(engine) as session:
-        expense = session.get(Expense, id)
-        if expense:
-            session.delete(expense)
-            session.commit()
+        expense = session.get(Expense, id, with_for_update=True)
+        if expense is None:
+            return
+        _update_rollup(session, 'expense', expense.category, expense.date, -expense.amount, -1)
+        session.delete(expense)
+        session.add(DeletedRow(table_name='expense', row_id=id))
+        session.commit()
+        _written('expense')
 
 def delete_salary(id: int):
     with Session(engine) as session:
-        salary = session.get(Salary, id)
-        if salary:
-            session.delete(salary)
-            session.commit()
-
-# Initialize the database when the module is imported
-init_db() 
\ No newline at end of file
+        salary = session.get(Salary, id, with_for_update=True)
+        if salary is None:
+            return
+        _update_rollup(session, 'salary', salary.teacher_name, salary.date, -salary.amount, -1)
+        session.delete(salary)
+        session.add(DeletedRow(table_name='salary', row_id=id))
+        session.commit()
+        _written('salary')
@@ -1,9 +1,46 @@
-from sqlalchemy.pool import QueuePool
-
-POOL_CONFIG = {
-    'poolclass': QueuePool,
-    'pool_size': 5,
-    'max_overflow': 10,
-    'pool_pre_ping': True,
-    'pool_recycle': 3600,
-} 
\ No newline at end of file
+import os
+import threading
+from sqlalchemy import create_engine
+from diagnostics import TimedNullPool, TimedQueuePool, instrument_engine
+
+# Statements slower than this are logged and listed in Admin Settings
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# DB_POOL_MODE=queue pools connections in this process; use pgbouncer with Supabase's transaction-mode
+# pooler (port 6543), which already shares server connections, so none are held here
+POOL_MODE = os.getenv("DB_POOL_MODE", "queue")
+
+# Also the number of reads fetch_concurrently runs in parallel
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+if POOL_MODE == "queue":
+    POOL_CONFIG = {
+        'poolclass': TimedQueuePool,
+        'pool_size': POOL_SIZE,
+        'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        'pool_timeout': float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        'pool_pre_ping': os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    }
+elif POOL_MODE == "pgbouncer":
+    POOL_CONFIG = {'poolclass': TimedNullPool}
+else:
+    raise ValueError(f"DB_POOL_MODE must be 'queue' or 'pgbouncer', not {POOL_MODE!r}")
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def shared_engine(url: str):
+    """The process's single engine for `url`, created on first use and shared by every session."""
+    with _engines_lock:
+        if url not in _engines:
+            engine = create_engine(url, echo=False, **POOL_CONFIG)
+            instrument_engine(engine, SLOW_QUERY_MS)
+            _engines[url] = engine
+        return _engines[url]
+
+# Optional local read replica (see replica.py): a SQLite file path enables it
+REPLICA_DB_PATH = os.getenv("REPLICA_DB_PATH", "")
+REPLICA_SYNC_SECONDS = float(os.getenv("REPLICA_SYNC_SECONDS", "15"))
+# Reads are flagged as stale in the UI once the last successful sync is older than this
+REPLICA_MAX_STALENESS_SECONDS = float(os.getenv("REPLICA_MAX_STALENESS_SECONDS", "120"))
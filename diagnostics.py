@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+import numpy as np
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+# In-process performance counters for the Admin Settings diagnostics panel, keeping each metric's latest samples
+SAMPLES_PER_METRIC = 1000
+MAX_STATEMENTS = 200
+MAX_SLOW_QUERIES = 50
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_queries = deque(maxlen=SAMPLES_PER_METRIC)
+_pool_waits = deque(maxlen=SAMPLES_PER_METRIC)
+_statements = OrderedDict()
+_pages = {}
+_slow_queries = deque(maxlen=MAX_SLOW_QUERIES)
+class _TimedCheckout:
+    """Records how long each checkout took, and counts connections in use, waiting callers and timeouts"""
+    checked_out = 0
+    waiting = 0
+    timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        with _lock:
+            self.waiting += 1
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with _lock:
+                self.timeouts += 1
+            raise
+        finally:
+            with _lock:
+                self.waiting -= 1
+                _pool_waits.append(time.perf_counter() - started)
+        with _lock:
+            self.checked_out += 1
+        return connection
+
+    def _do_return_conn(self, record):
+        with _lock:
+            self.checked_out -= 1
+        super()._do_return_conn(record)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool whose checkout times are the waits for a free connection"""
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    """NullPool (for an external pooler such as PgBouncer) whose checkout times are connect times"""
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    values = np.fromiter(samples, dtype=float) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'count': len(values), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': values.max()}
+
+def _record_query(statement: str, seconds: float, rows: int, threshold_ms: float):
+    with _lock:
+        _queries.append(seconds)
+        stats = _statements.get(statement)
+        if stats is None:
+            stats = _statements[statement] = {'timings': deque(maxlen=SAMPLES_PER_METRIC), 'rows': 0, 'calls': 0}
+            while len(_statements) > MAX_STATEMENTS:
+                _statements.popitem(last=False)
+        else:
+            # Least recently run statements are evicted first, so hot ones stay tracked
+            _statements.move_to_end(statement)
+        stats['timings'].append(seconds)
+        stats['calls'] += 1
+        stats['rows'] += max(rows, 0)
+        if seconds * 1000 >= threshold_ms:
+            _slow_queries.append({'statement': statement, 'ms': seconds * 1000, 'rows': rows, 'at': time.time()})
+    if seconds * 1000 >= threshold_ms:
+        logger.warning("Slow query (%.0f ms, %d rows): %s", seconds * 1000, rows, statement)
+
+def instrument_engine(engine, slow_query_ms: float):
+    """Time every statement `engine` executes and log those slower than `slow_query_ms`"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        # rowcount is the number of rows fetched on psycopg2 and -1 for SQLite SELECTs
+        _record_query(statement, seconds, cursor.rowcount, slow_query_ms)
+
+def pool_status(engine) -> dict:
+    """Live state of `engine`'s pool; size and overflow only apply to a QueuePool"""
+    pool = engine.pool
+    with _lock:
+        status = {
+            'pool': type(pool).__name__,
+            'checked_out': getattr(pool, 'checked_out', None),
+            'waiting': getattr(pool, 'waiting', None),
+            'timeouts': getattr(pool, 'timeouts', None),
+        }
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), idle=pool.checkedin(), overflow=max(pool.overflow(), 0), max_overflow=pool._max_overflow)
+    return status
+
+def record_page(page: str, seconds: float):
+    with _lock:
+        _pages.setdefault(page, deque(maxlen=SAMPLES_PER_METRIC)).append(seconds)
+
+def get_diagnostics() -> dict:
+    with _lock:
+        statements = [
+            {'statement': statement, 'calls': stats['calls'], 'rows': stats['rows'], **_percentiles(stats['timings'])}
+            for statement, stats in _statements.items()
+        ]
+        return {
+            'queries': _percentiles(_queries),
+            'pool_wait': _percentiles(_pool_waits),
+            'statements': sorted(statements, key=lambda stats: stats['p95_ms'], reverse=True),
+            'pages': {page: _percentiles(timings) for page, timings in _pages.items()},
+            'slow_queries': list(reversed(_slow_queries)),
+        }
+
+def reset_diagnostics():
+    with _lock:
+        _queries.clear()
+        _pool_waits.clear()
+        _statements.clear()
+        _pages.clear()
+        _slow_queries.clear()
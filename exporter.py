@@ -0,0 +1,121 @@
+"""Stream a ledger to a CSV, Parquet or Excel file.
+
+    python exporter.py donations parquet --start 2024-07-01 --end 2025-06-30 -o donations.parquet
+"""
+import argparse
+import codecs
+import tempfile
+from datetime import date
+from typing import Optional
+from models import Donation, Expense, Salary
+from database import ensure_initialized, iter_ledger_chunks
+
+EXPORT_LEDGERS = {
+    'donations': Donation,
+    'expenses': Expense,
+    'salaries': Salary,
+}
+
+# Rows per Excel worksheet, header included; longer exports continue on a new sheet
+XLSX_SHEET_ROWS = 1_048_576
+
+def _columns(model) -> list:
+    """(name, Python type) of each exported column of `model`"""
+    return [
+        (column.name, getattr(column.type, 'python_type', str))
+        for column in model.__table__.columns if column.name != 'updated_at'
+    ]
+
+def _arrow_schema(model):
+    # pyarrow is only needed for Parquet, so it is imported on first use rather than with the app
+    import pyarrow as pa
+    # Fixed from the model so every chunk is written with the same types, even all-null ones
+    arrow_types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), date: pa.date32()}
+    return pa.schema([pa.field(name, arrow_types.get(python_type, pa.string())) for name, python_type in _columns(model)])
+
+def write_csv(chunks, out, model) -> int:
+    # A byte order mark, so Excel reads Bengali names as UTF-8
+    out.write(codecs.BOM_UTF8)
+    rows = 0
+    for chunk in chunks:
+        chunk.to_csv(out, index=False, header=rows == 0, encoding='utf-8', date_format='%Y-%m-%d')
+        rows += len(chunk)
+    if rows == 0:
+        out.write((','.join(name for name, _ in _columns(model)) + '\n').encode())
+    return rows
+
+def write_parquet(chunks, out, model) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _arrow_schema(model)
+    rows = 0
+    with pq.ParquetWriter(out, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+def write_xlsx(chunks, out, model) -> int:
+    from openpyxl import Workbook
+    # Write-only workbooks stream each sheet's rows to disk instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    header = [name for name, _ in _columns(model)]
+    title = model.__tablename__
+    sheet, sheet_rows, rows = None, 0, 0
+    for chunk in chunks:
+        for row in chunk.itertuples(index=False, name=None):
+            if sheet is None or sheet_rows == XLSX_SHEET_ROWS:
+                sheet = workbook.create_sheet(f"{title} ({len(workbook.worksheets) + 1})" if sheet else title)
+                sheet.append(header)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+            rows += 1
+    if sheet is None:
+        workbook.create_sheet(title).append(header)
+    workbook.save(out)
+    return rows
+
+# Format -> (MIME type, writer taking (chunks, binary file, model) and returning the rows written)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', write_csv),
+    'parquet': ('application/vnd.apache.parquet', write_parquet),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', write_xlsx),
+}
+
+def export_ledger(ledger: str, fmt: str, out, start: Optional[date] = None, end: Optional[date] = None,
+                  anonymous_label: Optional[str] = None) -> int:
+    """Write `ledger`'s rows dated `start` to `end` to the binary file `out` as `fmt`, oldest first; returns the row count."""
+    model = EXPORT_LEDGERS[ledger]
+    _, writer = EXPORT_FORMATS[fmt]
+    return writer(iter_ledger_chunks(model, start, end, anonymous_label), out, model)
+
+def export_bytes(ledger: str, fmt: str, start: Optional[date] = None, end: Optional[date] = None,
+                 anonymous_label: Optional[str] = None) -> bytes:
+    """The finished export file's contents, for a download button."""
+    with tempfile.TemporaryFile() as out:
+        export_ledger(ledger, fmt, out, start, end, anonymous_label)
+        out.seek(0)
+        return out.read()
+
+def export_filename(ledger: str, fmt: str, start: Optional[date] = None, end: Optional[date] = None) -> str:
+    period = f"{start or 'start'}_to_{end or date.today()}"
+    return f"{ledger}_{period}.{fmt}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ledger", choices=list(EXPORT_LEDGERS))
+    parser.add_argument("format", choices=list(EXPORT_FORMATS))
+    parser.add_argument("--start", type=date.fromisoformat, help="First date to include (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last date to include (YYYY-MM-DD)")
+    parser.add_argument("-o", "--output", help="File to write; named after the ledger and period by default")
+    args = parser.parse_args()
+
+    ensure_initialized()
+    path = args.output or export_filename(args.ledger, args.format, args.start, args.end)
+    with open(path, "wb") as out:
+        rows = export_ledger(args.ledger, args.format, out, args.start, args.end)
+    print(f"Wrote {rows} rows to {path}")
+
+if __name__ == "__main__":
+    main()
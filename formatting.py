@@ -0,0 +1,95 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from translations import get_text
+
+CURRENCY_SYMBOL = "৳"
+
+# DataFrame column -> translation key of its display heading
+COLUMN_LABEL_KEYS = {
+    'donor_name': 'column_donor_name',
+    'display_name': 'column_display_name',
+    'teacher_name': 'column_teacher_name',
+    'description': 'column_description',
+    'amount': 'column_amount',
+    'date': 'column_date',
+    'notes': 'column_notes',
+    'category': 'column_category',
+    'is_anonymous': 'column_is_anonymous',
+    'kind': 'column_kind',
+    'party': 'column_party',
+    'balance': 'column_balance',
+    'total': 'column_total',
+    'gifts': 'column_gifts',
+    'average': 'column_average',
+    'first_gift': 'column_first_gift',
+    'last_gift': 'column_last_gift',
+    'lapsed': 'column_lapsed',
+}
+
+def format_currency(value) -> str:
+    return f"{CURRENCY_SYMBOL}{value:,.2f}"
+
+@lru_cache(maxsize=None)
+def column_map(language: str) -> dict:
+    """Translated column headings, built once per language"""
+    return {column: get_text(key, language) for column, key in COLUMN_LABEL_KEYS.items()}
+
+def format_currency_array(values) -> np.ndarray:
+    """Vectorised format_currency: digits, thousands separators and signs are assembled as NumPy arrays"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return np.array([], dtype=str)
+
+    scaled = np.abs(values) * 100
+    cents = np.rint(scaled).astype(np.int64)
+    whole, fraction = cents // 100, cents % 100
+
+    # One column of character codes per output position, most significant digit
+    # first; positions before a number's leading digit are padding spaces
+    places = len(str(int(whole.max())))
+    columns = []
+    for place in range(places - 1, -1, -1):
+        present = (whole >= 10 ** place) | (place == 0)
+        columns.append(np.where(present, (whole // 10 ** place) % 10 + ord('0'), ord(' ')))
+        if place and place % 3 == 0:
+            columns.append(np.where(present, ord(','), ord(' ')))
+    columns += [np.full_like(whole, ord('.')), fraction // 10 + ord('0'), fraction % 10 + ord('0')]
+
+    codes = np.ascontiguousarray(np.stack(columns, axis=1), dtype=np.uint32)
+    digits = np.strings.lstrip(codes.view(f'U{codes.shape[1]}').ravel())
+    signs = np.where(values < 0, '-', '')
+    formatted = np.strings.add(np.strings.add(CURRENCY_SYMBOL, signs), digits)
+
+    # Half-cent ties round differently in float arithmetic than in str.format; defer those to Python
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        formatted = formatted.astype(object)
+        formatted[ties] = [format_currency(value) for value in values[ties]]
+    return formatted
+
+def format_age(seconds) -> str:
+    """Short human-readable duration such as '45 s', '12 min' or '3 h'"""
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.0f} h"
+
+def format_dates(dates: pd.Series, pattern: str = '%d %B, %Y') -> np.ndarray:
+    """Format each distinct date once and broadcast the strings back to every row"""
+    codes, uniques = pd.factorize(pd.to_datetime(dates))
+    labels = np.asarray(pd.DatetimeIndex(uniques).strftime(pattern), dtype=object)
+    return np.where(codes >= 0, labels[codes] if len(labels) else None, None)
+
+def display_names(df: pd.DataFrame, anonymous_label: str) -> pd.Series:
+    """Donor names with anonymous donations replaced by `anonymous_label`, without a per-row apply"""
+    names = df['donor_name']
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        if anonymous_label not in names.cat.categories:
+            names = names.cat.add_categories([anonymous_label])
+    else:
+        names = names.astype(object)
+    return names.mask(df['is_anonymous'].astype(bool), anonymous_label)
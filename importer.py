@@ -0,0 +1,71 @@
+import math
+from typing import List, Tuple
+import pandas as pd
+from pydantic import ValidationError
+from models import EXPENSE_CATEGORIES, Donation, DonationBase, Expense, ExpenseBase, Salary, SalaryBase
+from database import bulk_insert
+
+# Ledger name -> (table model, schema each uploaded row is validated against)
+IMPORT_SCHEMAS = {
+    'donations': (Donation, DonationBase),
+    'expenses': (Expense, ExpenseBase),
+    'salaries': (Salary, SalaryBase),
+}
+
+# Columns an uploaded row must fill although the models give them a default; a
+# blank amount would otherwise be imported as a silent 0-taka entry
+REQUIRED_COLUMNS = ('amount',)
+
+def read_upload(upload) -> pd.DataFrame:
+    """Read an uploaded CSV or Excel file, keeping every cell as text for validation"""
+    name = getattr(upload, 'name', str(upload)).lower()
+    if name.endswith('.xlsx'):
+        frame = pd.read_excel(upload, dtype=object)
+    else:
+        frame = pd.read_csv(upload, dtype=object, skipinitialspace=True)
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    return frame
+
+def validate_rows(frame: pd.DataFrame, schema) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """Validate each row against `schema`; returns the valid rows and (spreadsheet row number, error) pairs for the rest."""
+    fields = list(schema.model_fields)
+    required = [field for field in fields if schema.model_fields[field].is_required() or field in REQUIRED_COLUMNS]
+    missing = [field for field in required if field not in frame.columns]
+    if missing:
+        return [], [(1, f"Missing column(s): {', '.join(missing)}")]
+
+    valid, errors = [], []
+    records = frame[[field for field in fields if field in frame.columns]].to_dict('records')
+    for position, record in enumerate(records, start=2):
+        values = {}
+        for field, value in record.items():
+            if isinstance(value, str):
+                value = value.strip() or None
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                continue
+            values[field] = value.date() if isinstance(value, pd.Timestamp) else value
+        messages = [f"{field}: Field required" for field in REQUIRED_COLUMNS if field not in values]
+        try:
+            row = schema.model_validate(values).model_dump()
+        except ValidationError as e:
+            messages += [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()]
+        else:
+            # Held to what the single-row forms allow; 'inf' parses as a float but can't be stored as poisha
+            if not math.isfinite(row['amount']):
+                messages.append("amount: Input should be a finite number")
+            elif row['amount'] < 0:
+                messages.append("amount: Input should be greater than or equal to 0")
+            if 'category' in row and row['category'] not in EXPENSE_CATEGORIES:
+                messages.append(f"category: Input should be one of {', '.join(EXPENSE_CATEGORIES)}")
+        if messages:
+            errors.append((position, "; ".join(messages)))
+        else:
+            valid.append(row)
+    return valid, errors
+
+def import_file(upload, ledger: str) -> dict:
+    """Validate an uploaded file and insert its valid rows into `ledger` in one batch"""
+    model, schema = IMPORT_SCHEMAS[ledger]
+    valid, errors = validate_rows(read_upload(upload), schema)
+    inserted = bulk_insert(model, valid)
+    return {'inserted': inserted, 'errors': errors}
@@ -1,36 +1,123 @@
-from database import engine as new_engine
-from sqlmodel import SQLModel, create_engine, Session, select
-from models import Donation, Expense, Salary, AdminUser
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import BigInteger, Float, Integer, func, inspect, select, text, type_coerce
+from sqlmodel import create_engine
+from database import engine as new_engine, init_db, rebuild_donor_rollups, rebuild_monthly_rollups
+from models import Donation, Expense, Salary, AdminUser, Money, to_poisha
 
 # Old SQLite database
-old_engine = create_engine("sqlite:///./data/maktab_finance.db")
-
-def migrate_data():
-    # Create new tables
-    SQLModel.metadata.create_all(new_engine)
-    
-    with Session(old_engine) as old_session, Session(new_engine) as new_session:
-        # Migrate donations
-        donations = old_session.exec(select(Donation)).all()
-        for donation in donations:
-            new_session.add(Donation(**donation.dict()))
-        
-        # Migrate expenses
-        expenses = old_session.exec(select(Expense)).all()
-        for expense in expenses:
-            new_session.add(Expense(**expense.dict()))
-        
-        # Migrate salaries
-        salaries = old_session.exec(select(Salary)).all()
-        for salary in salaries:
-            new_session.add(Salary(**salary.dict()))
-        
-        # Migrate admin users
-        admins = old_session.exec(select(AdminUser)).all()
-        for admin in admins:
-            new_session.add(AdminUser(**admin.dict()))
-        
-        new_session.commit()
+OLD_DB_URL = "sqlite:///./data/maktab_finance.db"
+
+# Rows fetched, inserted and committed per step
+CHUNK_SIZE = 5000
+
+LEDGERS = [Donation, Expense, Salary]
+
+def migrate_table(old_engine, model, chunk_size: int = CHUNK_SIZE) -> int:
+    """Stream `model`'s rows in id order into the new database a chunk per commit, resuming after the highest id present."""
+    table = model.__table__
+    with new_engine.connect() as new_connection:
+        resume_after = new_connection.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+    if resume_after:
+        print(f"{table.name}: resuming after id {resume_after}")
+
+    # Columns added since the old database was created (e.g. updated_at) take their defaults
+    old_columns = {column['name']: column['type'] for column in inspect(old_engine).get_columns(table.name)}
+    columns = [
+        _old_column(column, old_columns[column.name]) for column in table.columns if column.name in old_columns
+    ]
+
+    copied = 0
+    with old_engine.connect() as old_connection:
+        old_connection.execution_options(stream_results=True, yield_per=chunk_size)
+        result = old_connection.execute(select(*columns).where(table.c.id > resume_after).order_by(table.c.id))
+        for chunk in result.mappings().partitions():
+            with new_engine.begin() as new_connection:
+                new_connection.execute(table.insert(), [dict(row) for row in chunk])
+            copied += len(chunk)
+            print(f"{table.name}: {copied} rows copied (through id {chunk[-1]['id']})")
+    return copied
+
+def _stored_as_taka(column, stored_type) -> bool:
+    """Whether `column` is an amount the database still holds as float taka, from before amounts were whole poisha"""
+    return isinstance(column.type, Money) and not isinstance(stored_type, Integer)
+
+def _old_column(column, stored_type):
+    # Float taka are read as they are; Money on the new table converts them to poisha on insert
+    return type_coerce(column, Float).label(column.name) if _stored_as_taka(column, stored_type) else column
+
+def migrate_admins(old_engine):
+    """Copy admin accounts by username, replacing the default admin init_db may have created"""
+    table = AdminUser.__table__
+    with old_engine.connect() as old_connection, new_engine.begin() as new_connection:
+        for admin in old_connection.execute(select(table.c.username, table.c.password_hash)).mappings():
+            updated = new_connection.execute(
+                table.update().where(table.c.username == admin['username']).values(password_hash=admin['password_hash'])
+            )
+            if not updated.rowcount:
+                new_connection.execute(table.insert().values(**admin))
+
+def reset_sequences(models=LEDGERS):
+    """Move Postgres id sequences past the copied ids so new inserts don't collide"""
+    if new_engine.dialect.name != 'postgresql':
+        return
+    with new_engine.begin() as connection:
+        for model in models:
+            name = model.__tablename__
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {name}"
+            ))
+
+def checksum_query(model):
+    """Row count and the amounts' total as stored, which is whole poisha"""
+    total = type_coerce(func.coalesce(func.sum(model.amount), 0), BigInteger)
+    return select(func.count(), total).select_from(model.__table__)
+
+def table_checksums(engine) -> dict:
+    """Row count and amount total in whole poisha per ledger"""
+    checksums = {}
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        for model in LEDGERS:
+            count, total = connection.execute(checksum_query(model)).one()
+            stored_type = {column['name']: column['type'] for column in inspector.get_columns(model.__tablename__)}['amount']
+            total = to_poisha(total) if _stored_as_taka(model.__table__.c.amount, stored_type) else int(total)
+            checksums[model.__tablename__] = (count, total)
+    return checksums
+
+def verify(old_engine) -> bool:
+    old_checksums, new_checksums = table_checksums(old_engine), table_checksums(new_engine)
+    ok = True
+    for name, expected in old_checksums.items():
+        actual = new_checksums[name]
+        status = "OK" if actual == expected else "MISMATCH"
+        ok = ok and actual == expected
+        print(f"{name}: old {expected[0]} rows / {expected[1] / 100:,.2f}, new {actual[0]} rows / {actual[1] / 100:,.2f} ... {status}")
+    return ok
+
+def migrate_data(source_url: str = OLD_DB_URL, chunk_size: int = CHUNK_SIZE, workers: int = len(LEDGERS)) -> bool:
+    old_engine = create_engine(source_url)
+
+    # The full schema setup, as on app start; the default admin it may add is replaced below
+    init_db()
+
+    # The ledgers don't reference each other, so they can be copied side by side
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda model: migrate_table(old_engine, model, chunk_size), LEDGERS))
+    migrate_admins(old_engine)
+    reset_sequences()
+
+    # Rollups are derived data, so compute them from the migrated ledgers
+    rebuild_monthly_rollups()
+    rebuild_donor_rollups()
+
+    return verify(old_engine)
 
 if __name__ == "__main__":
-    migrate_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Copy the old SQLite data into the configured database")
+    parser.add_argument("--source", default=OLD_DB_URL, help="SQLAlchemy URL of the old database")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=len(LEDGERS), help="Tables migrated concurrently")
+    args = parser.parse_args()
+    if not migrate_data(args.source, args.chunk_size, args.workers):
+        raise SystemExit("Verification failed: row counts or amount totals differ")
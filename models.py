@@ -1,35 +1,139 @@
-from datetime import date
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
 from typing import Optional
+from sqlalchemy import BigInteger, Index, TypeDecorator, func
 from sqlmodel import Field, SQLModel
 
+def to_poisha(amount) -> int:
+    """`amount` taka as a whole number of poisha, half a poisha rounding up; ValueError if it isn't finite"""
+    if isinstance(amount, int):
+        return amount * 100
+    # Through the shortest decimal repr, so 0.285 is 28.5 poisha rather than its binary 28.4999...
+    value = Decimal(str(amount))
+    if not value.is_finite():
+        raise ValueError(f"Amount must be a finite number of taka, not {amount}")
+    return int(value.scaleb(2).quantize(Decimal(1), ROUND_HALF_UP))
+
+class Money(TypeDecorator):
+    """Taka amounts stored exactly as whole poisha in a BIGINT"""
+    impl = BigInteger
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return float
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_poisha(value)
+
+    def process_result_value(self, value, dialect):
+        # Postgres returns a BIGINT SUM as NUMERIC; still whole poisha
+        return None if value is None else round(value) / 100
+
+def money_field():
+    return Field(default=0.0, sa_type=Money)
+
+def updated_at_field():
+    """Last-change time set by the database on insert and update; the read replica syncs rows changed since its last pass"""
+    return Field(default=None, nullable=False, sa_column_kwargs={
+        'server_default': func.now(), 'default': func.now(), 'onupdate': func.now(),
+    })
+
+def trigram_index(table: str, column: str) -> Index:
+    """GIN trigram index behind the search in search.py; Postgres only, SQLite uses FTS5 instead"""
+    return Index(
+        f'ix_{table}_{column}_trgm', column,
+        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+    ).ddl_if(dialect='postgresql')
+
 class DonationBase(SQLModel):
     donor_name: str
-    amount: float = Field(default=0.0)
+    amount: float = money_field()
     date: date
     notes: Optional[str] = None
     is_anonymous: bool = Field(default=False)
 
 class Donation(DonationBase, table=True):
+    # (date, id) serves ORDER BY date DESC and the keyset pagination; the
+    # (name, amount) indexes cover the dashboard's GROUP BY / COUNT(DISTINCT)
+    __table_args__ = (
+        Index('ix_donation_date_id', 'date', 'id'),
+        Index('ix_donation_donor_name_amount', 'donor_name', 'amount'),
+        Index('ix_donation_updated_at', 'updated_at'),
+        trigram_index('donation', 'donor_name'),
+        trigram_index('donation', 'notes'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    updated_at: Optional[datetime] = updated_at_field()
+
+# The categories an expense can be recorded under
+EXPENSE_CATEGORIES = ["Utilities", "Supplies", "Maintenance", "Other"]
 
 class ExpenseBase(SQLModel):
     description: str
-    amount: float = Field(default=0.0)
+    amount: float = money_field()
     date: date
     category: str
 
 class Expense(ExpenseBase, table=True):
+    __table_args__ = (
+        Index('ix_expense_date_id', 'date', 'id'),
+        Index('ix_expense_category_amount', 'category', 'amount'),
+        Index('ix_expense_updated_at', 'updated_at'),
+        trigram_index('expense', 'description'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    updated_at: Optional[datetime] = updated_at_field()
 
 class SalaryBase(SQLModel):
     teacher_name: str
-    amount: float = Field(default=0.0)
+    amount: float = money_field()
     date: date
 
 class Salary(SalaryBase, table=True):
+    __table_args__ = (
+        Index('ix_salary_date_id', 'date', 'id'),
+        Index('ix_salary_teacher_name_amount', 'teacher_name', 'amount'),
+        Index('ix_salary_updated_at', 'updated_at'),
+        trigram_index('salary', 'teacher_name'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    updated_at: Optional[datetime] = updated_at_field()
 
 class AdminUser(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(unique=True)
-    password_hash: bytes 
\ No newline at end of file
+    password_hash: bytes 
+class MonthlyRollup(SQLModel, table=True):
+    """Per-month totals kept in step with the ledgers by the write functions in database.py"""
+    month: date = Field(primary_key=True)
+    kind: str = Field(primary_key=True)  # 'donation', 'expense' or 'salary'
+    label: str = Field(default='', primary_key=True)  # expense category or teacher name; '' for donations
+    total: float = money_field()
+    count: int = Field(default=0)
+
+class DonorRollup(SQLModel, table=True):
+    """Per-donor totals, re-aggregated for the donors a donation write touches by the write functions in database.py"""
+    donor_name: str = Field(primary_key=True)
+    # Anonymous gifts are totalled apart, so visitors' views can leave them out
+    is_anonymous: bool = Field(default=False, primary_key=True)
+    total: float = money_field()
+    gifts: int = Field(default=0)
+    first_gift: date
+    last_gift: date
+
+class DeletedRow(SQLModel, table=True):
+    """Ledger rows removed since they were recorded, so the read replica can delete its copies"""
+    __table_args__ = (
+        Index('ix_deletedrow_deleted_at', 'deleted_at'),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    table_name: str
+    row_id: int
+    deleted_at: Optional[datetime] = Field(default=None, nullable=False, sa_column_kwargs={
+        'server_default': func.now(), 'default': func.now(),
+    })
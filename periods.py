@@ -0,0 +1,43 @@
+import os
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+# Bangladesh's fiscal year runs July to June
+FISCAL_YEAR_START_MONTH = int(os.getenv("FISCAL_YEAR_START_MONTH", "7"))
+
+def _month_start(year: int, month: int) -> date:
+    """First day of `month` in `year`, with months past 12 or below 1 carried into the neighbouring years"""
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return date(year, month, 1)
+
+def fiscal_year_start(day: date) -> date:
+    """First day of the fiscal year `day` falls in"""
+    year = day.year if day.month >= FISCAL_YEAR_START_MONTH else day.year - 1
+    return date(year, FISCAL_YEAR_START_MONTH, 1)
+
+def fiscal_year_label(start: date) -> str:
+    """'2024-25' for the fiscal year starting `start`, or '2025' when it matches the calendar year"""
+    end = _month_start(start.year + 1, start.month) - timedelta(days=1)
+    return str(start.year) if start.year == end.year else f"{start.year}-{end.year % 100:02d}"
+
+def _this_fiscal_year(today: date) -> Tuple[date, date]:
+    start = fiscal_year_start(today)
+    return start, _month_start(start.year + 1, start.month) - timedelta(days=1)
+
+def _last_fiscal_year(today: date) -> Tuple[date, date]:
+    end = fiscal_year_start(today) - timedelta(days=1)
+    return fiscal_year_start(end), end
+
+# Named reporting periods -> (first day, last day) for a given today; None is an open end
+PERIOD_PRESETS = {
+    'last_30_days': lambda today: (today - timedelta(days=29), today),
+    'this_month': lambda today: (today.replace(day=1), _month_start(today.year, today.month + 1) - timedelta(days=1)),
+    'last_month': lambda today: (_month_start(today.year, today.month - 1), today.replace(day=1) - timedelta(days=1)),
+    'this_fiscal_year': _this_fiscal_year,
+    'last_fiscal_year': _last_fiscal_year,
+    'all_time': lambda today: (None, None),
+}
+
+def period_range(preset: str, today: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+    """The inclusive (start, end) dates of a PERIOD_PRESETS period as of `today`"""
+    return PERIOD_PRESETS[preset](today or date.today())
@@ -0,0 +1,6 @@
+from database import rebuild_donor_rollups, rebuild_monthly_rollups
+
+if __name__ == "__main__":
+    rebuild_monthly_rollups()
+    rebuild_donor_rollups()
+    print("Monthly and donor rollups rebuilt")
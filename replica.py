@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, event, func, inspect, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import SQLModel
+from cache import bump_version
+from db_config import REPLICA_DB_PATH, REPLICA_MAX_STALENESS_SECONDS, REPLICA_SYNC_SECONDS
+from diagnostics import instrument_engine
+from models import Donation, Expense, Salary, MonthlyRollup, DonorRollup, DeletedRow
+from search import create_sqlite_index
+
+# Optional local SQLite copy of the ledgers and rollups that database.py reads from once synced;
+# writes go to Postgres and are synced after each one and every REPLICA_SYNC_SECONDS
+LEDGERS = [Donation, Expense, Salary]
+ROLLUPS = [MonthlyRollup, DonorRollup]
+SYNC_CHUNK_SIZE = 5000
+
+# Each sync re-reads rows changed this long before the previous one started,
+# so a transaction that committed late is still picked up
+SYNC_OVERLAP = timedelta(seconds=120)
+
+logger = logging.getLogger(__name__)
+
+_state_metadata = MetaData()
+_sync_state = Table(
+    'replica_sync_state', _state_metadata,
+    Column('name', String, primary_key=True),
+    # Same type as the ledgers' updated_at, so watermarks compare against it exactly
+    Column('watermark', Donation.__table__.c.updated_at.type),
+)
+
+engine = create_engine(f"sqlite:///{REPLICA_DB_PATH}", connect_args={'check_same_thread': False}) if REPLICA_DB_PATH else None
+
+_lock = threading.Lock()
+_primary = None
+_thread = None
+_status = {'ready': False, 'last_sync': None, 'last_error': None}
+
+if engine is not None:
+    instrument_engine(engine, float('inf'))
+
+    @event.listens_for(engine, "connect")
+    def _configure(connection, record):
+        # WAL lets pages read while a sync is writing
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+def enabled() -> bool:
+    return engine is not None
+
+def is_ready() -> bool:
+    return _status['ready']
+
+def start(primary):
+    """Create the replica's tables and begin syncing from `primary` in the background"""
+    global _primary, _thread
+    if engine is None or _thread is not None:
+        return
+    _primary = primary
+    tables = [model.__table__ for model in LEDGERS + ROLLUPS]
+    # A replica kept from before amounts were stored as whole poisha holds taka; it is copied afresh
+    inspector = inspect(engine)
+    if inspector.has_table('donation') and not isinstance(
+            {column['name']: column['type'] for column in inspector.get_columns('donation')}['amount'], Integer):
+        SQLModel.metadata.drop_all(engine, tables=tables)
+        _state_metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine, tables=tables)
+    _state_metadata.create_all(engine)
+    # Its own search index, kept current by triggers as synced rows land
+    create_sqlite_index(engine)
+
+    # A replica kept from an earlier run is served straight away, flagged with its age
+    with engine.connect() as connection:
+        synced_at = connection.execute(select(_sync_state.c.watermark).where(_sync_state.c.name == 'synced_at')).scalar()
+    if synced_at is not None:
+        # Written in UTC; older SQLModel column types hand it back naive, which .timestamp() would take as local time
+        if synced_at.tzinfo is None:
+            synced_at = synced_at.replace(tzinfo=timezone.utc)
+        _status.update(ready=True, last_sync=synced_at.timestamp())
+
+    _thread = threading.Thread(target=_sync_forever, name='replica-sync', daemon=True)
+    _thread.start()
+
+def _sync_forever():
+    while True:
+        try_sync()
+        time.sleep(REPLICA_SYNC_SECONDS)
+
+def try_sync(rollups: bool = False):
+    """sync(), recording a failure in the status instead of raising; the next background pass retries"""
+    try:
+        sync(rollups)
+    except Exception as error:
+        _status['last_error'] = str(error)
+        logger.warning("Replica sync failed: %s", error)
+
+def _copy_changes(source, target, table, since) -> int:
+    """Upsert the rows of `table` changed after `since` (all rows if None); returns how many were copied"""
+    query = select(table)
+    if since is not None:
+        query = query.where(table.c.updated_at > since)
+    result = source.execution_options(yield_per=SYNC_CHUNK_SIZE).execute(query)
+    upsert = sqlite_insert(table)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=['id'],
+        set_={column.name: upsert.excluded[column.name] for column in table.columns if column.name != 'id'},
+    )
+    copied = 0
+    for chunk in result.mappings().partitions():
+        target.execute(upsert, [dict(row) for row in chunk])
+        copied += len(chunk)
+    return copied
+
+def _apply_deletions(source, target, since) -> set:
+    """Delete the local copies of rows deleted after `since`; returns the tables that lost rows"""
+    query = select(DeletedRow.table_name, DeletedRow.row_id)
+    if since is not None:
+        query = query.where(DeletedRow.deleted_at > since)
+    tables = {model.__tablename__: model.__table__ for model in LEDGERS}
+    touched = set()
+    for table_name, row_id in source.execute(query):
+        result = target.execute(delete(tables[table_name]).where(tables[table_name].c.id == row_id))
+        if result.rowcount:
+            touched.add(table_name)
+    return touched
+
+def sync(rollups: bool = False) -> int:
+    """Copy every change since the last sync into the replica; returns the number of ledger rows copied."""
+    if engine is None or _primary is None:
+        return 0
+    with _lock:
+        changed = set()
+        copied = 0
+        with _primary.connect() as source, engine.begin() as target:
+            # Watermarks are read from the primary's clock, the one that stamps updated_at
+            started = source.execute(select(type_coerce(func.now(), _sync_state.c.watermark.type))).scalar()
+            previous = target.execute(select(_sync_state.c.watermark).where(_sync_state.c.name == 'watermark')).scalar()
+            since = previous - SYNC_OVERLAP if previous is not None else None
+            for model in LEDGERS:
+                rows = _copy_changes(source, target, model.__table__, since)
+                copied += rows
+                if rows:
+                    changed.add(model.__tablename__)
+            changed |= _apply_deletions(source, target, since)
+
+            if changed or rollups:
+                for rollup in ROLLUPS:
+                    target.execute(delete(rollup.__table__))
+                    rows = [dict(row) for row in source.execute(select(rollup.__table__)).mappings()]
+                    if rows:
+                        target.execute(rollup.__table__.insert(), rows)
+
+            synced_at = time.time()
+            target.execute(delete(_sync_state))
+            target.execute(_sync_state.insert(), [
+                {'name': 'watermark', 'watermark': started},
+                {'name': 'synced_at', 'watermark': datetime.fromtimestamp(synced_at, timezone.utc)},
+            ])
+        _status.update(ready=True, last_sync=synced_at, last_error=None)
+    if changed or rollups:
+        bump_version(*(changed or {model.__tablename__ for model in LEDGERS}))
+    return copied
+
+def staleness() -> Optional[float]:
+    """Seconds since the replica last synced, or None if it is disabled or has never synced"""
+    if engine is None or _status['last_sync'] is None:
+        return None
+    return time.time() - _status['last_sync']
+
+def get_replica_status() -> dict:
+    age = staleness()
+    return {
+        'enabled': engine is not None,
+        'ready': _status['ready'],
+        'staleness_s': age,
+        'stale': age is not None and age > REPLICA_MAX_STALENESS_SECONDS,
+        'last_error': _status['last_error'],
+    }
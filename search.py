@@ -0,0 +1,166 @@
+import bisect
+import unicodedata
+from collections import Counter
+from typing import Optional
+from sqlalchemy import and_, column, false, literal_column, or_, table, text
+from cache import cached_read
+from models import Donation, Expense, Salary
+
+# Full-text search over the ledgers: pg_trgm GIN indexes on Postgres, trigger-maintained FTS5 indexes on SQLite
+SEARCH_FIELDS = {
+    Donation: ('donor_name', 'notes'),
+    Expense: ('description',),
+    Salary: ('teacher_name',),
+}
+
+# Fields that only match when the flag column beside them is false, unless
+# private matches are asked for: anonymous donors are found by admins only
+PRIVATE_FIELDS = {
+    Donation: {'donor_name': 'is_anonymous'},
+}
+
+# Shorter queries would match most rows, so the pages show the whole ledger instead
+MIN_QUERY_LENGTH = 2
+
+# On SQLite a query word also matches the indexed words sharing at least this
+# share of its trigrams (pg_trgm's similarity measure and default threshold)
+FUZZY_THRESHOLD = 0.3
+FUZZY_TERMS = 10
+
+# A prefix with at most this many completions is searched as those exact words:
+# FTS5 reads exact words newest row first, but merges a prefix's whole result
+# set in memory before returning any of it
+PREFIX_TERMS = 50
+
+# Word characters for the FTS5 tokenizer; M* keeps Bengali vowel signs inside words
+FTS_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+
+def query_words(query: str) -> list:
+    return query.split() if len(query.strip()) >= MIN_QUERY_LENGTH else []
+
+def _fts_table(model) -> str:
+    return f"{model.__tablename__}_search"
+
+def _fts_columns(model) -> dict:
+    """FTS5 column name -> SQL for its value in a trigger row (`{row}` is new or old)"""
+    private = PRIVATE_FIELDS.get(model, {})
+    columns = {}
+    for field in SEARCH_FIELDS[model]:
+        if field in private:
+            flag = private[field]
+            columns[field] = f"CASE WHEN {{row}}.{flag} THEN NULL ELSE {{row}}.{field} END"
+            columns[f"{field}_private"] = f"CASE WHEN {{row}}.{flag} THEN {{row}}.{field} END"
+        else:
+            columns[field] = f"{{row}}.{field}"
+    return columns
+
+def create_sqlite_index(engine):
+    """Create the contentless FTS5 index and its triggers for each ledger on a SQLite `engine`; a no-op elsewhere."""
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as connection:
+        triggers = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+        for model in SEARCH_FIELDS:
+            name, fts = model.__tablename__, _fts_table(model)
+            if f"{fts}_insert" in triggers:
+                continue
+            # Dropping a ledger drops its triggers but leaves the index behind, out of date
+            connection.execute(text(f"DROP TABLE IF EXISTS {fts}_vocab"))
+            connection.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+            columns = _fts_columns(model)
+            names = ', '.join(columns)
+            new_values = ', '.join(value.format(row='new') for value in columns.values())
+            old_values = ', '.join(value.format(row='old') for value in columns.values())
+            remove = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+            add = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='', tokenize=\"{FTS_TOKENIZER}\", prefix='2 3')"
+            ))
+            connection.execute(text(f"CREATE VIRTUAL TABLE {fts}_vocab USING fts5vocab({fts}, row)"))
+            connection.execute(text(f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {name} BEGIN {add} END"))
+            connection.execute(text(f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {name} BEGIN {remove} END"))
+            connection.execute(text(f"CREATE TRIGGER {fts}_update AFTER UPDATE ON {name} BEGIN {remove} {add} END"))
+            # Index the rows recorded before the search index existed
+            values = ', '.join(value.format(row=name) for value in columns.values())
+            connection.execute(text(f"INSERT INTO {fts}(rowid, {names}) SELECT id, {values} FROM {name}"))
+
+def _trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _normalize(word: str) -> str:
+    """`word` as the FTS5 tokenizer stores it: lower case, punctuation dropped"""
+    return ''.join(ch for ch in word.lower() if ch.isalnum() or unicodedata.category(ch).startswith('M'))
+
+class TermIndex:
+    """Trigram index over the distinct words of one ledger's FTS5 index, for finding misspelt words"""
+
+    def __init__(self, terms):
+        self.terms = sorted(terms)
+        self.term_trigrams = [_trigrams(term) for term in self.terms]
+        self.postings = {}
+        for position, trigrams in enumerate(self.term_trigrams):
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, []).append(position)
+
+    def completions(self, prefix: str, limit: int = PREFIX_TERMS) -> Optional[list]:
+        """The indexed words starting with `prefix`, or None if there are more than `limit`"""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + '\U0010ffff', start, min(start + limit + 1, len(self.terms)))
+        matches = self.terms[start:end]
+        if len(matches) > limit:
+            return None
+        return [term for term in matches if term.startswith(prefix)]
+
+    def similar(self, word: str, limit: int = FUZZY_TERMS) -> list:
+        trigrams = _trigrams(word)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        scored = []
+        for position, count in shared.items():
+            score = count / (len(trigrams) + len(self.term_trigrams[position]) - count)
+            if score >= FUZZY_THRESHOLD:
+                scored.append((score, self.terms[position]))
+        scored.sort(reverse=True)
+        return [term for _, term in scored[:limit]]
+
+@cached_read('donation', 'expense', 'salary')
+def _term_index(engine, model) -> TermIndex:
+    with engine.connect() as connection:
+        terms = connection.execute(text(f"SELECT term FROM {_fts_table(model)}_vocab")).scalars()
+        return TermIndex(terms)
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def _like_pattern(word: str) -> str:
+    return '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def matching_rows(engine, model, words: list, include_private: bool = True):
+    """(from clause, where clause, id column) for rows of `model` where every word of `words` matches a search field."""
+    private = {} if include_private else PRIVATE_FIELDS.get(model, {})
+    if engine.dialect.name == 'postgresql':
+        def word_match(field, word):
+            column_ = getattr(model, field)
+            match = or_(column_.ilike(_like_pattern(word), escape='\\'), column_.op('%>')(word))
+            return and_(match, getattr(model, private[field]) == false()) if field in private else match
+        where = and_(*[or_(*[word_match(field, word) for field in SEARCH_FIELDS[model]]) for word in words])
+        return model.__table__, where, model.id
+
+    terms = _term_index(engine, model)
+    groups = []
+    for word in filter(None, map(_normalize, words)):
+        # A word with no completions yet may be newer than the cached term index
+        options = [_fts_phrase(term) for term in terms.completions(word) or []] or [_fts_phrase(word) + '*']
+        # Numbers are only matched by prefix; a near miss is a different receipt or amount
+        if len(word) >= 3 and not any(ch.isdigit() for ch in word):
+            options += [_fts_phrase(term) for term in terms.similar(word) if not term.startswith(word)]
+        groups.append('(' + ' OR '.join(options) + ')')
+    if not groups:
+        return model.__table__, false(), model.id
+    columns = [name for name in _fts_columns(model) if include_private or not name.endswith('_private')]
+    expression = f"{{{' '.join(columns)}}} : ({' AND '.join(groups)})"
+    fts = table(_fts_table(model), column('rowid'))
+    where = literal_column(fts.name).op('MATCH')(expression)
+    return fts.join(model.__table__, model.id == fts.c.rowid), where, fts.c.rowid
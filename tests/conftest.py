@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The engine is created when database is imported, so point it at a scratch SQLite file first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.pop("REPLICA_DB_PATH", None)
+
+@pytest.fixture
+def db():
+    """The database module over freshly created, empty tables"""
+    from sqlmodel import SQLModel
+    import cache
+    import database
+
+    SQLModel.metadata.drop_all(database.engine)
+    database.init_db()
+    cache.clear_cache()
+    return database
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+import auth
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    for state in (auth._failures, auth._not_before, auth._known_clients):
+        state.clear()
+
+def test_token_round_trip():
+    token = auth.issue_token("admin", "1.2.3.4")
+    assert auth.verify_token(token, "1.2.3.4") == "admin"
+
+@pytest.mark.parametrize('token', [None, "", "no-signature", "bm90|a|token.deadbeef"])
+def test_malformed_tokens_are_rejected(token):
+    assert auth.verify_token(token, "1.2.3.4") is None
+
+def test_token_is_bound_to_its_client():
+    token = auth.issue_token("admin", "1.2.3.4")
+    assert auth.verify_token(token, "5.6.7.8") is None
+
+def test_tampered_token_is_rejected():
+    token = auth.issue_token("admin", "1.2.3.4")
+    encoded, signature = token.rsplit('.', 1)
+    forged = auth.base64.urlsafe_b64encode(
+        auth.base64.urlsafe_b64decode(encoded).replace(b"admin", b"other")
+    ).decode('ascii')
+    assert auth.verify_token(f"{forged}.{signature}", "1.2.3.4") is None
+    assert auth.verify_token(f"{encoded}.{'0' * len(signature)}", "1.2.3.4") is None
+
+def test_expired_token_is_rejected():
+    assert auth.verify_token(auth.issue_token("admin", "1.2.3.4", ttl=-1), "1.2.3.4") is None
+
+def test_revoking_invalidates_earlier_tokens_only(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(auth.time, 'time', lambda: now)
+    old = auth.issue_token("admin", "1.2.3.4")
+    other = auth.issue_token("clerk", "1.2.3.4")
+    auth.revoke_tokens("admin")
+    monkeypatch.setattr(auth.time, 'time', lambda: now + 2)
+    assert auth.verify_token(old, "1.2.3.4") is None
+    assert auth.verify_token(other, "1.2.3.4") == "clerk"
+    assert auth.verify_token(auth.issue_token("admin", "1.2.3.4"), "1.2.3.4") == "admin"
+
+def test_failures_throttle_the_client(db):
+    for _ in range(auth.MAX_FAILURES_PER_CLIENT):
+        assert auth.login("admin", "wrong", "1.2.3.4") is None
+    assert auth.login_retry_after("admin", "1.2.3.4") > 0
+    # Even the right password is refused while throttled, and other clients are unaffected
+    assert auth.login("admin", "admin123", "1.2.3.4") is None
+    assert auth.login_retry_after("admin", "5.6.7.8") == 0
+    assert auth.login("admin", "admin123", "5.6.7.8") is not None
+
+def test_failures_expire_after_the_window(db, monkeypatch):
+    for _ in range(auth.MAX_FAILURES_PER_CLIENT):
+        auth.login("admin", "wrong", "1.2.3.4")
+    later = time.time() + auth.FAILURE_WINDOW_SECONDS + 1
+    monkeypatch.setattr(auth.time, 'time', lambda: later)
+    assert auth.login_retry_after("admin", "1.2.3.4") == 0
+
+def test_username_cap_spares_clients_that_already_logged_in(db):
+    assert auth.login("admin", "admin123", "10.0.0.1") is not None
+    # Guesses spread over many clients, each under its own limit
+    for attempt in range(auth.MAX_FAILURES_PER_USERNAME):
+        auth.login("admin", "wrong", f"192.0.2.{attempt}")
+    assert auth.login_retry_after("admin", "198.51.100.1") > 0
+    assert auth.login_retry_after("admin", "10.0.0.1") == 0
+    assert auth.login("admin", "admin123", "10.0.0.1") is not None
+
+def test_success_clears_the_clients_failures(db):
+    for _ in range(auth.MAX_FAILURES_PER_CLIENT - 1):
+        auth.login("admin", "wrong", "1.2.3.4")
+    assert auth.login("admin", "admin123", "1.2.3.4") is not None
+    auth.login("admin", "wrong", "1.2.3.4")
+    assert auth.login_retry_after("admin", "1.2.3.4") == 0
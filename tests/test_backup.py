@@ -0,0 +1,25 @@
+from datetime import date, datetime, timedelta, timezone
+
+import backup
+
+def test_backups_started_at_the_same_instant_get_their_own_snapshots(db, monkeypatch, tmp_path):
+    instant = datetime(2025, 1, 1, 18, 0, tzinfo=timezone.utc)
+    ticks = iter([instant, instant, instant + timedelta(microseconds=1)])
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(ticks)
+
+    monkeypatch.setattr(backup, 'datetime', Clock)
+    db.add_donation("A", 10.0, date(2024, 1, 5), "", False)
+    full = backup.backup(str(tmp_path))
+    db.add_donation("B", 20.0, date(2024, 1, 6), "", False)
+    incremental = backup.backup(str(tmp_path))
+
+    assert [full['name'], incremental['name']] == ['20250101T180000000000Z', '20250101T180000000001Z']
+    assert incremental['kind'] == 'incremental' and incremental['base'] == full['name']
+    assert [manifest['name'] for manifest in backup.list_snapshots(str(tmp_path))] == [full['name'], incremental['name']]
+
+    assert backup.restore(str(tmp_path / incremental['name']), replace=True)
+    assert sorted(db.get_donations_df()['donor_name']) == ["A", "B"]
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import cache
+from models import Expense
+
+def test_results_are_reused_until_a_write(db):
+    db.add_donation("A", 10.0, date(2024, 1, 5), "", False)
+    first = db.get_donations_df()
+    assert db.get_donations_df() is first
+
+    db.add_donation("B", 20.0, date(2024, 1, 6), "", False)
+    assert db.get_donations_df()['donor_name'].tolist() == ["B", "A"]
+
+def test_a_write_invalidates_only_readers_of_that_table(db):
+    expenses = db.get_expenses_df()
+    summary = db.get_dashboard_summary()
+    db.add_donation("A", 10.0, date(2024, 1, 5), "", False)
+    assert db.get_expenses_df() is expenses
+    assert db.get_dashboard_summary() is not summary
+    assert db.get_dashboard_summary()['total_donations'] == 10.0
+
+def test_every_write_path_invalidates(db):
+    db.add_expense("Chalk", 5.0, date(2024, 1, 5), "Supplies")
+    expense_id = int(db.get_expenses_df()['id'][0])
+    db.update_expense(expense_id, "Chalk", 7.0, date(2024, 1, 5), "Supplies")
+    assert db.get_expenses_df()['amount'].tolist() == [7.0]
+    db.apply_changes(Expense, inserted=[{'description': "Ink", 'amount': 1.0, 'date': date(2024, 1, 6), 'category': "Supplies"}])
+    assert len(db.get_expenses_df()) == 2
+    db.bulk_insert(Expense, [{'description': "Paper", 'amount': 2.0, 'date': date(2024, 1, 7), 'category': "Supplies"}])
+    assert len(db.get_expenses_df()) == 3
+    db.delete_expense(expense_id)
+    assert len(db.get_expenses_df()) == 2
+    assert db.get_dashboard_summary()['total_expenses'] == 3.0
+
+def test_writes_from_another_process_show_once_entries_expire(db, monkeypatch):
+    db.add_donation("A", 10.0, date(2024, 1, 5), "", False)
+    assert len(db.get_donations_df()) == 1
+    # Written behind this process's back, so no version is bumped
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO donation (donor_name, amount, date, is_anonymous) VALUES ('B', 500, '2024-01-06', 0)")
+    assert len(db.get_donations_df()) == 1
+
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now + cache.CACHE_TTL_SECONDS + 1)
+    assert len(db.get_donations_df()) == 2
+    assert cache.get_cache_stats()['expired'] >= 1
+
+def test_donors_lapse_as_the_date_moves_on(db):
+    db.add_donation("A", 10.0, date(2024, 1, 1), "", False)
+    last_active = date(2024, 1, 1) + timedelta(days=db.LAPSED_AFTER_DAYS)
+    assert db.get_donor_overview(last_active)['lapsed'] == 0
+    assert db.get_donor_leaderboard(25, last_active)['frame']['lapsed'].tolist() == [False]
+    assert db.get_donor_overview(last_active + timedelta(days=1))['lapsed'] == 1
+    assert db.get_donor_leaderboard(25, last_active + timedelta(days=1))['frame']['lapsed'].tolist() == [True]
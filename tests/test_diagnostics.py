@@ -0,0 +1,9 @@
+import diagnostics
+
+def test_statements_are_evicted_least_recently_run_first(monkeypatch):
+    monkeypatch.setattr(diagnostics, 'MAX_STATEMENTS', 3)
+    monkeypatch.setattr(diagnostics, '_statements', diagnostics.OrderedDict())
+    for statement in ["hot", "a", "b", "hot", "c", "hot", "d"]:
+        diagnostics._record_query(statement, 0.001, 1, threshold_ms=1e9)
+    assert list(diagnostics._statements) == ["c", "hot", "d"]
+    assert diagnostics._statements["hot"]['calls'] == 3
@@ -0,0 +1,56 @@
+import io
+
+import pandas as pd
+import pytest
+
+from importer import import_file, validate_rows
+from models import DonationBase, ExpenseBase, SalaryBase
+
+def read(text: str) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(text), dtype=object, skipinitialspace=True)
+
+def test_valid_rows_pass():
+    valid, errors = validate_rows(read("donor_name,amount,date\nA,100.50,2024-01-05\n"), DonationBase)
+    assert errors == []
+    assert valid[0]['amount'] == 100.5
+
+def test_missing_amount_column_is_rejected():
+    valid, errors = validate_rows(read("donor_name,date\nA,2024-01-05\n"), DonationBase)
+    assert valid == []
+    assert errors == [(1, "Missing column(s): amount")]
+
+@pytest.mark.parametrize('amount', ['', 'nan', 'NaN'])
+def test_empty_or_nan_amount_is_a_row_error(amount):
+    valid, errors = validate_rows(read(f"donor_name,amount,date\nA,{amount},2024-01-05\nB,5,2024-01-06\n"), DonationBase)
+    assert [row['donor_name'] for row in valid] == ['B']
+    assert errors == [(2, "amount: Field required")]
+
+def test_non_numeric_amount_is_a_row_error():
+    valid, errors = validate_rows(read("description,amount,date,category\nChalk,abc,2024-01-05,Supplies\n"), ExpenseBase)
+    assert valid == []
+    assert errors[0][0] == 2 and errors[0][1].startswith("amount: ")
+
+@pytest.mark.parametrize('amount', ['inf', '-inf', 'Infinity', '1e400'])
+def test_non_finite_amount_is_a_row_error(amount):
+    valid, errors = validate_rows(read(f"donor_name,amount,date\nA,{amount},2024-01-05\n"), DonationBase)
+    assert valid == []
+    assert errors == [(2, "amount: Input should be a finite number")]
+
+def test_non_finite_amount_is_reported_not_raised_on_import(db):
+    upload = io.StringIO("donor_name,amount,date\nA,inf,2024-01-05\nB,,2024-01-06\nC,12.5,2024-01-07\n")
+    result = import_file(upload, 'donations')
+    assert result['inserted'] == 1
+    assert [row for row, _ in result['errors']] == [2, 3]
+    assert db.get_donations_df()['amount'].tolist() == [12.5]
+
+def test_negative_amount_is_a_row_error():
+    valid, errors = validate_rows(read("teacher_name,amount,date\nT,-5,2024-01-05\nT,0,2024-01-06\n"), SalaryBase)
+    assert [row['amount'] for row in valid] == [0.0]
+    assert errors == [(2, "amount: Input should be greater than or equal to 0")]
+
+def test_unknown_expense_category_is_a_row_error():
+    valid, errors = validate_rows(
+        read("description,amount,date,category\nChalk,5,2024-01-05,Custom\nInk,2,2024-01-05,Supplies\n"), ExpenseBase
+    )
+    assert [row['category'] for row in valid] == ["Supplies"]
+    assert errors == [(2, "category: Input should be one of Utilities, Supplies, Maintenance, Other")]
@@ -0,0 +1,37 @@
+import math
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import StatementError
+
+from models import to_poisha
+
+@pytest.mark.parametrize('taka, poisha', [
+    (0.285, 29),
+    (1.005, 101),
+    (2.675, 268),
+    (0.284, 28),
+    (-0.285, -29),
+    (12, 1200),
+    (100.5, 10050),
+    (0.1 + 0.2, 30),
+])
+def test_to_poisha_rounds_half_up(taka, poisha):
+    assert to_poisha(taka) == poisha
+
+@pytest.mark.parametrize('taka', [math.inf, -math.inf, math.nan])
+def test_to_poisha_rejects_non_finite(taka):
+    with pytest.raises(ValueError):
+        to_poisha(taka)
+
+def test_amounts_are_stored_as_poisha_and_read_back_as_taka(db):
+    db.add_donation("A", 0.285, date(2024, 1, 5), "", False)
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT amount FROM donation").scalar() == 29
+    assert db.get_donations_df()['amount'].tolist() == [0.29]
+
+def test_non_finite_amount_is_not_written(db):
+    with pytest.raises(StatementError, match="finite"):
+        db.add_donation("A", math.inf, date(2024, 1, 5), "", False)
+    assert db.get_donations_df().empty
+    assert db.get_monthly_rollups().empty
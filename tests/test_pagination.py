@@ -0,0 +1,102 @@
+from datetime import date
+
+from sqlmodel import Session, select
+
+from models import Donation
+
+DONATIONS = [
+    ("A", date(2024, 1, 5), False), ("B", date(2024, 1, 5), False), ("A", date(2024, 1, 5), True),
+    ("C", date(2024, 2, 1), False), ("A", date(2024, 2, 1), False), ("B", date(2024, 3, 9), False),
+    ("A", date(2024, 3, 9), False), ("A", date(2024, 4, 2), False),
+]
+
+def seed(db):
+    for donor, day, anonymous in DONATIONS:
+        db.add_donation(donor, 10.0, day, "", anonymous)
+    with Session(db.engine) as session:
+        rows = session.exec(select(Donation.date, Donation.id)).all()
+    # Newest first, rows on the same date by id descending
+    return [id for _, id in sorted(rows, reverse=True)]
+
+def walk_forward(fetch, page_size):
+    pages, cursor = [], {}
+    # Bounded, so paging that never ends fails the test instead of hanging it
+    for _ in DONATIONS:
+        page = fetch(page_size, **cursor)
+        pages.append(page)
+        if not page['has_next']:
+            break
+        cursor = {'after': page['last_cursor']}
+    return pages
+
+def ids(page) -> list:
+    return page['frame']['id'].tolist()
+
+def test_forward_paging_visits_every_row_once_in_order(db):
+    expected = seed(db)
+    pages = walk_forward(db.get_donations_page, 3)
+    assert [ids(page) for page in pages] == [expected[0:3], expected[3:6], expected[6:8]]
+    assert [page['has_prev'] for page in pages] == [False, True, True]
+    assert [page['has_next'] for page in pages] == [True, True, False]
+
+def test_duplicate_dates_are_split_across_pages_by_id(db):
+    expected = seed(db)
+    # The three 2024-01-05 rows are split between the third and fourth page of 2
+    pages = walk_forward(db.get_donations_page, 2)
+    assert sum((ids(page) for page in pages), []) == expected
+    assert pages[2]['frame']['date'].dt.date.tolist() == [date(2024, 2, 1), date(2024, 1, 5)]
+
+def test_back_paging_returns_the_previous_pages(db):
+    seed(db)
+    pages = walk_forward(db.get_donations_page, 3)
+    back = db.get_donations_page(3, before=pages[2]['first_cursor'])
+    assert ids(back) == ids(pages[1])
+    assert back['has_prev'] and back['has_next']
+    first = db.get_donations_page(3, before=back['first_cursor'])
+    assert ids(first) == ids(pages[0])
+    assert not first['has_prev'] and first['has_next']
+
+def test_edges(db):
+    empty = db.get_donations_page(3)
+    assert empty['frame'].empty and not empty['has_next'] and not empty['has_prev']
+    assert empty['first_cursor'] is None and empty['last_cursor'] is None
+
+    expected = seed(db)
+    whole = db.get_donations_page(len(expected))
+    assert ids(whole) == expected and not whole['has_next'] and not whole['has_prev']
+    # Seeking past the last row gives an empty page that can still go back
+    past = db.get_donations_page(3, after=whole['last_cursor'])
+    assert past['frame'].empty and past['has_prev'] and not past['has_next']
+
+def test_combined_filters_page_within_the_filter(db):
+    seed(db)
+    fetch = lambda page_size, **cursor: db.get_donations_page(
+        page_size, start=date(2024, 1, 5), end=date(2024, 3, 9), donor="A", include_anonymous=False, **cursor
+    )
+    pages = walk_forward(fetch, 1)
+    rows = [page['frame'].iloc[0] for page in pages]
+    assert [(row['donor_name'], row['date'].date()) for row in rows] == [
+        ("A", date(2024, 3, 9)), ("A", date(2024, 2, 1)), ("A", date(2024, 1, 5)),
+    ]
+    assert not any(row['is_anonymous'] for row in rows)
+    back = fetch(1, before=pages[-1]['first_cursor'])
+    assert ids(back) == ids(pages[1])
+    # Admins picking the donor also see the anonymous gift
+    admin = db.get_donations_page(10, start=date(2024, 1, 5), end=date(2024, 3, 9), donor="A")
+    assert len(admin['frame']) == 4
+
+def test_expense_and_salary_pages_filter_by_label(db):
+    db.add_expense("Chalk", 5.0, date(2024, 1, 5), "Supplies")
+    db.add_expense("Fan", 50.0, date(2024, 1, 6), "Maintenance")
+    db.add_salary("Teacher A", 100.0, date(2024, 1, 28))
+    db.add_salary("Teacher B", 100.0, date(2024, 1, 28))
+    assert db.get_expenses_page(10, category="Supplies")['frame']['description'].tolist() == ["Chalk"]
+    assert db.get_salaries_page(10, teacher="Teacher B")['frame']['teacher_name'].tolist() == ["Teacher B"]
+
+def test_a_query_too_short_to_search_pages_through_the_ledger(db):
+    expected = seed(db)
+    fetch = lambda page_size, **cursor: db.search_donations("A", page_size, **cursor)
+    pages = walk_forward(fetch, 3)
+    assert [ids(page) for page in pages] == [expected[0:3], expected[3:6], expected[6:8]]
+    back = fetch(3, before=pages[1]['first_cursor'])
+    assert ids(back) == expected[0:3]
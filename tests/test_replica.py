@@ -0,0 +1,32 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import DateTime, create_engine
+
+import replica
+
+@pytest.fixture
+def local_time(monkeypatch):
+    """Run with a local clock six hours ahead of UTC"""
+    monkeypatch.setenv('TZ', 'Asia/Dhaka')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_a_kept_replica_reports_its_real_age_after_a_restart(db, local_time, monkeypatch, tmp_path):
+    monkeypatch.setattr(replica, 'engine', create_engine(f"sqlite:///{os.path.join(tmp_path, 'replica.db')}"))
+    monkeypatch.setattr(replica, '_status', {'ready': False, 'last_sync': None, 'last_error': None})
+    monkeypatch.setattr(replica, '_sync_forever', lambda: None)
+    monkeypatch.setattr(replica, '_thread', None)
+    replica.start(db.engine)
+    replica.sync()
+
+    # A new process starts from what the replica file recorded, read back naive as SQLModel's older DateTime did
+    monkeypatch.setattr(replica._sync_state.c.watermark, 'type', DateTime())
+    monkeypatch.setattr(replica, '_status', {'ready': False, 'last_sync': None, 'last_error': None})
+    monkeypatch.setattr(replica, '_thread', None)
+    replica.start(db.engine)
+    assert replica.is_ready()
+    assert 0 <= replica.staleness() < 60
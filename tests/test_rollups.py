@@ -0,0 +1,100 @@
+from datetime import date
+
+from sqlmodel import Session, select
+
+from models import Donation, DonorRollup, Expense, MonthlyRollup, Salary
+
+def rollups(db) -> dict:
+    """The monthly and donor rollup rows, leaving out monthly rows emptied by deletes"""
+    with Session(db.engine) as session:
+        monthly = {
+            (row.month, row.kind, row.label): (row.total, row.count)
+            for row in session.exec(select(MonthlyRollup)) if row.count != 0
+        }
+        donors = {
+            (row.donor_name, row.is_anonymous): (row.total, row.gifts, row.first_gift, row.last_gift)
+            for row in session.exec(select(DonorRollup))
+        }
+    return {'monthly': monthly, 'donors': donors}
+
+def ids(db, model) -> list:
+    with Session(db.engine) as session:
+        return list(session.exec(select(model.id).order_by(model.id)))
+
+def assert_rollups_match_rebuild(db):
+    kept = rollups(db)
+    db.rebuild_monthly_rollups()
+    db.rebuild_donor_rollups()
+    assert kept == rollups(db)
+
+def test_rollups_follow_every_write_path(db):
+    # Half-poisha amounts, so every path has to round each row the way it is stored
+    db.add_donation("Karim", 0.285, date(2024, 1, 5), "", False)
+    db.add_donation("Karim", 100.005, date(2024, 1, 31), "", True)
+    db.add_donation("Rahim", 50.125, date(2024, 2, 1), "zakat", False)
+    db.add_expense("Chalk", 12.345, date(2024, 1, 10), "Supplies")
+    db.add_expense("Fan repair", 800.5, date(2024, 2, 10), "Maintenance")
+    db.add_salary("Teacher A", 5000.005, date(2024, 1, 28))
+    db.add_salary("Teacher B", 4500.0, date(2024, 2, 28))
+
+    donations, expenses, salaries = ids(db, Donation), ids(db, Expense), ids(db, Salary)
+    # Moving rows across months, labels, donors and anonymity
+    db.update_donation(donations[0], "Rahim", 10.015, date(2024, 3, 1), "", False)
+    db.update_donation(donations[1], "Karim", 100.005, date(2024, 1, 31), "", False)
+    db.update_expense(expenses[0], "Chalk", 13.335, date(2024, 3, 10), "Other")
+    db.update_salary(salaries[0], "Teacher B", 5100.255, date(2024, 1, 28))
+    db.delete_donation(donations[2])
+    db.delete_expense(expenses[1])
+    db.delete_salary(salaries[1])
+    # Deleting or updating a row that is already gone changes nothing
+    db.delete_donation(donations[2])
+    db.update_expense(expenses[1], "Gone", 1.0, date(2024, 1, 1), "Other")
+    assert_rollups_match_rebuild(db)
+
+    db.bulk_insert(Donation, [
+        {'donor_name': f"Donor {i % 3}", 'amount': 0.005 + i, 'date': date(2024, 1 + i % 4, 1 + i), 'notes': None,
+         'is_anonymous': i % 5 == 0}
+        for i in range(20)
+    ])
+    db.bulk_insert(Expense, [
+        {'description': "Bulk", 'amount': 1.115 * i, 'date': date(2024, 2, 1 + i), 'category': "Utilities"}
+        for i in range(10)
+    ])
+    db.bulk_insert(Salary, [
+        {'teacher_name': "Teacher C", 'amount': 3000.125, 'date': date(2024, 4, 28)},
+    ])
+    assert_rollups_match_rebuild(db)
+
+    donations, expenses = ids(db, Donation), ids(db, Expense)
+    db.apply_changes(
+        Donation,
+        inserted=[{'donor_name': "Nasima", 'amount': 75.555, 'date': date(2024, 5, 2), 'notes': "", 'is_anonymous': False}],
+        updated={donations[0]: {'amount': 0.015, 'date': date(2024, 6, 1)}, donations[3]: {'donor_name': "Karim", 'is_anonymous': True}},
+        deleted=[donations[1], donations[5]],
+    )
+    db.apply_changes(
+        Expense,
+        updated={expenses[-1]: {'category': "Supplies", 'amount': 9.995}},
+        deleted=[expenses[0]],
+    )
+    assert_rollups_match_rebuild(db)
+
+def test_dashboard_totals_equal_ledger_sums(db):
+    for i in range(30):
+        db.add_donation(f"Donor {i % 4}", 0.005 * i + 1, date(2024, 1 + i % 12, 1 + i % 28), "", i % 7 == 0)
+        db.add_expense("Item", 0.015 * i, date(2024, 1 + i % 12, 15), "Supplies")
+    summary = db.get_dashboard_summary()
+    with db.engine.connect() as connection:
+        donations = connection.exec_driver_sql("SELECT SUM(amount) FROM donation").scalar()
+        expenses = connection.exec_driver_sql("SELECT SUM(amount) FROM expense").scalar()
+    assert summary['total_donations'] == donations / 100
+    assert summary['total_expenses'] == expenses / 100
+    assert summary['num_donors'] == 4
+    assert summary['expenses_by_category'] == [("Supplies", expenses / 100)]
+    # A period whose edges fall mid-month adds rollup months and ledger days to the same totals
+    period = db.get_dashboard_summary(date(2024, 2, 10), date(2024, 11, 20))
+    with db.engine.connect() as connection:
+        in_period = connection.exec_driver_sql(
+            "SELECT SUM(amount) FROM donation WHERE date BETWEEN '2024-02-10' AND '2024-11-20'"
+        ).scalar()
+    assert period['total_donations'] == in_period / 100
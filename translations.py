@@ -12,7 +12,13 @@ TRANSLATIONS = {
         'total_donations': 'Total Donations',
         'total_expenses': 'Total Expenses',
         'total_salaries': 'Total Salaries',
-        'monthly_trends': 'Monthly Financial Trends',
+        'financial_trends': 'Financial Trends',
+        'granularity': 'Group by',
+        'granularity_day': 'Day',
+        'granularity_week': 'Week',
+        'granularity_month': 'Month',
+        'granularity_year': 'Year',
+        'granularity_coarsened': 'Too many points for this range; showing totals by {} instead.',
         'recent_donations': 'Recent Donations',
         'donor_name': 'Donor Name',
         'amount': 'Amount',
@@ -48,7 +54,58 @@ TRANSLATIONS = {
         'column_date': 'Date',
         'column_notes': 'Notes',
         'column_category': 'Category',
-        'column_is_anonymous': 'Anonymous'
+        'column_is_anonymous': 'Anonymous',
+        'column_kind': 'Type',
+        'column_party': 'Paid by / to',
+        'column_balance': 'Balance',
+        'cash_flow': 'Cash Flow',
+        'from_date': 'From',
+        'to_date': 'To',
+        'opening_balance': 'Opening Balance',
+        'closing_balance': 'Closing Balance',
+        'no_cash_flow': 'No entries in this period',
+        'replica_age': 'Data updated {} ago',
+        'replica_stale': 'Showing saved data from {} ago; the database could not be reached.',
+        'replica_syncing': 'Loading a local copy of the data...',
+        'search': 'Search',
+        'search_help': 'Names and notes; close spellings match too',
+        'no_search_results': 'No matching entries',
+        'export': 'Export',
+        'export_format': 'Format',
+        'export_help': 'Leave the dates empty to export the whole history.',
+        'download': 'Download',
+        'batch_edit': 'Edit as table',
+        'batch_edit_help': 'Edit cells, add rows at the bottom or select rows to delete them, then save every change at once.',
+        'save_changes': 'Save changes',
+        'no_changes': 'Nothing has changed',
+        'changes_saved': 'Saved: {inserted} added, {updated} updated, {deleted} deleted',
+        'invalid_row': 'Row {row}: {error}',
+        'donors': 'Donors',
+        'sort_by': 'Sort by',
+        'lapsed_only': 'Lapsed donors only',
+        'lapsed_donors': 'Lapsed Donors',
+        'lapsed_help': 'No gift in the last {days} days',
+        'repeat_donors': 'Repeat Donors',
+        'anonymous_gifts': 'Anonymous Gifts',
+        'anonymous_gifts_note': '{count} anonymous gifts totalling {total} are not listed by name',
+        'column_total': 'Total Given',
+        'column_gifts': 'Gifts',
+        'column_average': 'Average Gift',
+        'column_first_gift': 'First Gift',
+        'column_last_gift': 'Last Gift',
+        'column_lapsed': 'Lapsed',
+        'period': 'Period',
+        'period_last_30_days': 'Last 30 days',
+        'period_this_month': 'This month',
+        'period_last_month': 'Last month',
+        'period_this_fiscal_year': 'This fiscal year',
+        'period_last_fiscal_year': 'Last fiscal year',
+        'period_all_time': 'All time',
+        'period_custom': 'Custom range',
+        'fiscal_year': 'FY {}',
+        'all_entries': 'All',
+        'no_entries_in_period': 'No entries in this period',
+        'period_net': 'Net for Period'
     },
     'bn': {
         'title': 'মক্তবের আর্থিক ব্যবস্থাপনা সিস্টেম',
@@ -64,7 +121,13 @@ TRANSLATIONS = {
         'total_donations': 'মোট সদাকা',
         'total_expenses': 'মোট খরচ',
         'total_salaries': 'মোট বেতন',
-        'monthly_trends': 'মাসিক আর্থিক প্রবণতা',
+        'financial_trends': 'আর্থিক প্রবণতা',
+        'granularity': 'অনুযায়ী দেখান',
+        'granularity_day': 'দিন',
+        'granularity_week': 'সপ্তাহ',
+        'granularity_month': 'মাস',
+        'granularity_year': 'বছর',
+        'granularity_coarsened': 'এই সময়সীমায় অনেক বেশি বিন্দু; তাই {} অনুযায়ী মোট দেখানো হচ্ছে।',
         'recent_donations': 'সাম্প্রতিক সদাকা',
         'donor_name': 'দাতার নাম',
         'amount': 'পরিমাণ',
@@ -100,7 +163,58 @@ TRANSLATIONS = {
         'column_date': 'তারিখ',
         'column_notes': 'নোট',
         'column_category': 'ক্যাটাগরি',
-        'column_is_anonymous': 'বেনামী'
+        'column_is_anonymous': 'বেনামী',
+        'column_kind': 'ধরন',
+        'column_party': 'প্রদানকারী / প্রাপক',
+        'column_balance': 'ব্যালেন্স',
+        'cash_flow': 'নগদ প্রবাহ',
+        'from_date': 'শুরু',
+        'to_date': 'শেষ',
+        'opening_balance': 'প্রারম্ভিক ব্যালেন্স',
+        'closing_balance': 'সমাপনী ব্যালেন্স',
+        'no_cash_flow': 'এই সময়ে কোন লেনদেন নেই',
+        'replica_age': 'ডাটা {} আগে হালনাগাদ হয়েছে',
+        'replica_stale': '{} আগের সংরক্ষিত ডাটা দেখানো হচ্ছে; ডাটাবেসের সাথে সংযোগ করা যায়নি।',
+        'replica_syncing': 'ডাটার একটি স্থানীয় কপি লোড হচ্ছে...',
+        'search': 'অনুসন্ধান',
+        'search_help': 'নাম ও নোট; কাছাকাছি বানানও মিলবে',
+        'no_search_results': 'কোন মিল পাওয়া যায়নি',
+        'export': 'রপ্তানি',
+        'export_format': 'ফরম্যাট',
+        'export_help': 'পুরো ইতিহাস রপ্তানি করতে তারিখ খালি রাখুন।',
+        'download': 'ডাউনলোড',
+        'batch_edit': 'টেবিল হিসেবে সম্পাদনা',
+        'batch_edit_help': 'ঘর সম্পাদনা করুন, নিচে সারি যোগ করুন বা মুছতে সারি নির্বাচন করুন, তারপর সব পরিবর্তন একসাথে সংরক্ষণ করুন।',
+        'save_changes': 'পরিবর্তন সংরক্ষণ',
+        'no_changes': 'কোন পরিবর্তন হয়নি',
+        'changes_saved': 'সংরক্ষিত: {inserted}টি যোগ, {updated}টি হালনাগাদ, {deleted}টি মোছা হয়েছে',
+        'invalid_row': 'সারি {row}: {error}',
+        'donors': 'দাতাগণ',
+        'sort_by': 'সাজানোর ক্রম',
+        'lapsed_only': 'শুধু নিষ্ক্রিয় দাতা',
+        'lapsed_donors': 'নিষ্ক্রিয় দাতা',
+        'lapsed_help': 'গত {days} দিনে কোন দান নেই',
+        'repeat_donors': 'একাধিকবার দানকারী',
+        'anonymous_gifts': 'বেনামী দান',
+        'anonymous_gifts_note': '{count}টি বেনামী দান (মোট {total}) নাম দিয়ে দেখানো হয়নি',
+        'column_total': 'মোট দান',
+        'column_gifts': 'দানের সংখ্যা',
+        'column_average': 'গড় দান',
+        'column_first_gift': 'প্রথম দান',
+        'column_last_gift': 'সর্বশেষ দান',
+        'column_lapsed': 'নিষ্ক্রিয়',
+        'period': 'সময়কাল',
+        'period_last_30_days': 'গত ৩০ দিন',
+        'period_this_month': 'এই মাস',
+        'period_last_month': 'গত মাস',
+        'period_this_fiscal_year': 'চলতি অর্থবছর',
+        'period_last_fiscal_year': 'গত অর্থবছর',
+        'period_all_time': 'সব সময়',
+        'period_custom': 'নির্দিষ্ট সময়সীমা',
+        'fiscal_year': 'অর্থবছর {}',
+        'all_entries': 'সব',
+        'no_entries_in_period': 'এই সময়ে কোন লেনদেন নেই',
+        'period_net': 'সময়কালের নিট'
     }
 }
 